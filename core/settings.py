@@ -114,6 +114,12 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Entrega de fotos de progreso: None (Django con FileResponse), 'x-accel-redirect' (nginx)
+# o 'x-sendfile' (Apache/lighttpd)
+MEDIA_SERVE_BACKEND = None
+# Location interna de nginx que apunta a MEDIA_ROOT (solo para 'x-accel-redirect')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
 # Tamaño máximo de archivo (10MB)
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760
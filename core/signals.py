@@ -0,0 +1,5 @@
+def is_cascade(instance, origin):
+    """Indica si el borrado viene en cascada desde otro modelo (p. ej. al borrar el usuario o un flujo)"""
+    if origin is None:
+        return False
+    return getattr(origin, 'model', type(origin)) is not type(instance)
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal, InvalidOperation, ROUND_DOWN
 
 from django.contrib.auth.decorators import login_required
@@ -32,28 +32,18 @@ def dashboard_view(request):
     today = timezone.localdate()
 
     try:
-        from tracking.models import WeightRecord, BodyMeasurement, ProgressPhoto
+        from tracking.summary import get_summary
         from finances.models import AnnualFlow
         from linux_commands.models import CommandTag, LinuxCommand
         from tasks.models import Task
 
-        # Obtener estadísticas de tracking
-        latest_weight = WeightRecord.objects.filter(user=request.user).order_by('-date').first()
+        # Estadísticas de tracking: una búsqueda del resumen por clave primaria
+        tracking_summary = get_summary(request.user)
         weight_stats = {
-            'current': latest_weight.weight if latest_weight else None,
-            'date': latest_weight.date if latest_weight else None
+            'current': tracking_summary.latest_weight,
+            'date': tracking_summary.latest_weight_date
         }
-
-        # Contar registros del último mes
-        last_month = datetime.now().date() - timedelta(days=30)
-        recent_measurements = BodyMeasurement.objects.filter(
-            user=request.user,
-            date__gte=last_month
-        ).count()
-        recent_photos = ProgressPhoto.objects.filter(
-            user=request.user,
-            date__gte=last_month
-        ).count()
+        recent_tracking_records = tracking_summary.recent_records(today)
 
         latest_finance_flow = AnnualFlow.objects.order_by('-year').first()
         current_flow_year = latest_finance_flow.year if latest_finance_flow else datetime.now().year
@@ -81,8 +71,7 @@ def dashboard_view(request):
 
     except Exception:
         weight_stats = {'current': None, 'date': None}
-        recent_measurements = 0
-        recent_photos = 0
+        recent_tracking_records = 0
         finance_stats = [
             {'label': 'Flujos Anual', 'value': str(datetime.now().year)},
             {'label': 'Remanentes', 'value': format_currency(0)},
@@ -111,7 +100,7 @@ def dashboard_view(request):
             'color': 'bg-danger',
             'stats': [
                 {'label': 'Peso Actual', 'value': f"{weight_stats['current']:.1f} kg" if weight_stats['current'] else 'Sin datos'},
-                {'label': 'Registros (30d)', 'value': f"{recent_measurements + recent_photos}"},
+                {'label': 'Registros (30d)', 'value': f"{recent_tracking_records}"},
             ]
         },
         {
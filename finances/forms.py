@@ -150,4 +150,43 @@ class PresupuestoItemForm(forms.ModelForm):
             'url': 'URL de referencia',
             'descripcion': 'Descripción',
             'costo': 'Costo'
-        }
\ No newline at end of file
+        }
+
+class BaseExpenseBulkFormSet(forms.BaseFormSet):
+    """Valida el lote completo de gastos contra un único saldo disponible."""
+
+    def __init__(self, *args, available_balance=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.available_balance = available_balance
+
+    def get_filled_forms(self):
+        return [form for form in self.forms if form.has_changed() and form.cleaned_data]
+
+    def clean(self):
+        if any(self.errors):
+            return
+
+        filled_forms = self.get_filled_forms()
+        if not filled_forms:
+            raise forms.ValidationError('Debes ingresar al menos un gasto.')
+
+        running_total = 0
+        for form in filled_forms:
+            running_total += form.cleaned_data['amount']
+            if running_total > self.available_balance:
+                form.add_error(
+                    'amount',
+                    f'Este gasto deja el acumulado (${running_total}) sobre el saldo disponible'
+                )
+
+        if running_total > self.available_balance:
+            raise forms.ValidationError(
+                f'El total del lote (${running_total}) excede el saldo disponible (${self.available_balance})'
+            )
+
+
+ExpenseBulkFormSet = forms.formset_factory(
+    ExpenseForm,
+    formset=BaseExpenseBulkFormSet,
+    extra=5,
+)
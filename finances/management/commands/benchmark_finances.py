@@ -0,0 +1,161 @@
+import json
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from finances.models import AnnualFlow, Expense, Income, MonthlyIncomeBook
+
+
+def percentile(values, pct):
+    """Percentil con interpolación lineal sobre una lista de valores."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia y consultas SQL de las vistas de finanzas y guarda el resultado en JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20,
+                            help='Peticiones medidas por vista')
+        parser.add_argument('--flow', type=int, default=None,
+                            help='ID del flujo anual a medir (por defecto el más reciente)')
+        parser.add_argument('--user', default=None,
+                            help='Email del usuario con el que se autentican las peticiones')
+        parser.add_argument('--output', default='finance_benchmark.json',
+                            help='Archivo JSON de salida')
+        parser.add_argument('--label', default='',
+                            help='Etiqueta libre para identificar la corrida')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations debe ser mayor que 0')
+
+        user = self._get_user(options['user'])
+        flow = self._get_flow(options['flow'])
+        targets = self._get_targets(flow)
+
+        client = Client()
+        client.force_login(user)
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, url in targets:
+                results[name] = self._measure(client, url, options['iterations'])
+                self.stdout.write(
+                    f"{name:<24} p50={results[name]['p50_ms']:8.2f}ms "
+                    f"p95={results[name]['p95_ms']:8.2f}ms "
+                    f"queries={results[name]['queries']}"
+                )
+
+        report = {
+            'label': options['label'],
+            'generated_at': timezone.now().isoformat(),
+            'git_commit': self._git_commit(),
+            'iterations': options['iterations'],
+            'dataset': {
+                'flow_year': flow.year,
+                'books': MonthlyIncomeBook.objects.filter(annual_flow=flow).count(),
+                'incomes': Income.objects.filter(book__annual_flow=flow).count(),
+                'expenses': Expense.objects.filter(income__book__annual_flow=flow).count(),
+            },
+            'results': results,
+        }
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def _measure(self, client, url, iterations):
+        # Petición de calentamiento para no medir la carga inicial de plantillas
+        client.get(url)
+
+        timings = []
+        queries = 0
+        status_code = None
+        for _ in range(iterations):
+            # El cliente reinicia el log de consultas al iniciar cada petición,
+            # así que se limpia antes para que el conteo empiece desde cero
+            reset_queries()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = len(context.captured_queries)
+            status_code = response.status_code
+
+        return {
+            'url': url,
+            'status_code': status_code,
+            'queries': queries,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'min_ms': round(min(timings), 3),
+            'max_ms': round(max(timings), 3),
+        }
+
+    def _get_user(self, email):
+        users = get_user_model().objects.all()
+        user = users.filter(email=email).first() if email else users.order_by('id').first()
+        if user is None:
+            raise CommandError('No hay un usuario disponible para autenticar las peticiones')
+        return user
+
+    def _get_flow(self, flow_id):
+        flows = AnnualFlow.objects.all()
+        flow = flows.filter(pk=flow_id).first() if flow_id else flows.order_by('-year').first()
+        if flow is None:
+            raise CommandError('No hay flujos anuales; ejecuta primero seed_finances')
+        return flow
+
+    def _get_targets(self, flow):
+        targets = [
+            ('flow-list', reverse('finances:flow-list')),
+            ('flow-detail', reverse('finances:flow-detail', args=[flow.pk])),
+            ('annual-report', reverse('finances:annual-report', args=[flow.pk])),
+            ('remnant-list', reverse('finances:flow-remnants', args=[flow.pk])),
+            ('category-list', reverse('finances:category-list')),
+            ('presupuesto-list', reverse('finances:presupuesto-list')),
+        ]
+
+        book = flow.income_books.annotate(
+            income_count=Count('incomes')
+        ).order_by('-income_count', 'month').first()
+        if book:
+            targets.append(('monthly-book-detail', reverse('finances:monthly-book-detail', args=[book.pk])))
+
+        income = Income.objects.filter(book__annual_flow=flow).annotate(
+            expense_count=Count('expenses')
+        ).order_by('-expense_count', 'id').first()
+        if income:
+            targets.append(('income-detail', reverse('finances:income-detail', args=[income.pk])))
+
+        return targets
+
+    def _git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
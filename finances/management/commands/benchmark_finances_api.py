@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from finances.models import Income
+
+from .benchmark_finances import Command as BenchmarkCommand, percentile
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Compara el throughput de la API JSON de finanzas servida por el handler WSGI '
+        '(hilos) frente al handler ASGI (corrutinas) sobre los mismos datos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Peticiones totales por modo')
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help='Peticiones simultáneas')
+        parser.add_argument('--flow', type=int, default=None,
+                            help='ID del flujo anual a medir (por defecto el más reciente)')
+        parser.add_argument('--user', default=None,
+                            help='Email del usuario con el que se autentican las peticiones')
+        parser.add_argument('--output', default='finance_api_benchmark.json',
+                            help='Archivo JSON de salida')
+        parser.add_argument('--label', default='',
+                            help='Etiqueta libre para identificar la corrida')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests y --concurrency deben ser mayores que 0')
+
+        self.user = self._get_user(options['user'])
+        flow = self._get_flow(options['flow'])
+        urls = self._get_api_urls(flow)
+        schedule = [urls[index % len(urls)] for index in range(options['requests'])]
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            results = {
+                'wsgi': self._run_wsgi(schedule, options['concurrency']),
+                'asgi': asyncio.run(self._run_asgi(schedule, options['concurrency'])),
+            }
+
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode}: {result['throughput_rps']:8.1f} req/s "
+                f"p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms "
+                f"errors={result['errors']}"
+            )
+
+        report = {
+            'label': options['label'],
+            'generated_at': timezone.now().isoformat(),
+            'git_commit': self._git_commit(),
+            'database': connections['default'].vendor,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'urls': urls,
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def _get_api_urls(self, flow):
+        urls = [reverse('finances:api-flow-summary', args=[flow.pk])]
+        book = flow.income_books.order_by('month').first()
+        if book:
+            urls.append(reverse('finances:api-monthly-book-summary', args=[book.pk]))
+        income = Income.objects.filter(book__annual_flow=flow).order_by('id').first()
+        if income:
+            urls.append(reverse('finances:api-income-summary', args=[income.pk]))
+        return urls
+
+    def _run_wsgi(self, schedule, concurrency):
+        def worker(urls):
+            client = Client()
+            client.force_login(self.user)
+            timings, errors = [], 0
+            for url in urls:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code != 200
+            connections.close_all()
+            return timings, errors
+
+        chunks = [schedule[index::concurrency] for index in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(worker, [chunk for chunk in chunks if chunk]))
+        elapsed = time.perf_counter() - start
+
+        timings = [timing for chunk_timings, _ in outcomes for timing in chunk_timings]
+        errors = sum(chunk_errors for _, chunk_errors in outcomes)
+        return self._summarize(timings, errors, elapsed)
+
+    async def _run_asgi(self, schedule, concurrency):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                return (time.perf_counter() - start) * 1000, response.status_code != 200
+
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(fetch(url) for url in schedule))
+        elapsed = time.perf_counter() - start
+
+        timings = [timing for timing, _ in outcomes]
+        errors = sum(error for _, error in outcomes)
+        return self._summarize(timings, errors, elapsed)
+
+    def _summarize(self, timings, errors, elapsed):
+        return {
+            'errors': errors,
+            'total_s': round(elapsed, 3),
+            'throughput_rps': round(len(timings) / elapsed, 2) if elapsed else 0,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+        }
@@ -0,0 +1,116 @@
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from finances.models import AnnualFlow, Expense, ExpenseCategory, Income, MonthlyIncomeBook
+
+
+class Command(BaseCommand):
+    help = 'Genera datos financieros sintéticos para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=2,
+                            help='Cantidad de flujos anuales a generar')
+        parser.add_argument('--start-year', type=int, default=None,
+                            help='Primer año a generar (por defecto termina en el año actual)')
+        parser.add_argument('--incomes-per-month', type=int, default=3,
+                            help='Ingresos por libro mensual')
+        parser.add_argument('--expenses-per-income', type=int, default=20,
+                            help='Gastos por ingreso')
+        parser.add_argument('--categories', type=int, default=8,
+                            help='Cantidad de categorías de gasto a usar')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Semilla para obtener datos reproducibles')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Tamaño de lote para bulk_create')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        for option in ('years', 'categories', 'incomes_per_month', 'expenses_per_income'):
+            if options[option] < 1:
+                raise CommandError(f'--{option.replace("_", "-")} debe ser mayor que 0')
+
+        start_year = options['start_year'] or timezone.now().year - options['years'] + 1
+        years = list(range(start_year, start_year + options['years']))
+
+        existing = list(
+            AnnualFlow.objects.filter(year__in=years).values_list('year', flat=True)
+        )
+        if existing:
+            raise CommandError(
+                f'Ya existen flujos para los años: {", ".join(map(str, sorted(existing)))}'
+            )
+
+        with transaction.atomic():
+            categories = self._get_categories(options['categories'])
+
+            AnnualFlow.objects.bulk_create(
+                [AnnualFlow(year=year) for year in years],
+                batch_size=batch_size
+            )
+            flows = AnnualFlow.objects.filter(year__in=years)
+
+            MonthlyIncomeBook.objects.bulk_create(
+                [
+                    MonthlyIncomeBook(annual_flow=flow, month=month)
+                    for flow in flows
+                    for month in range(1, 13)
+                ],
+                batch_size=batch_size
+            )
+            books = MonthlyIncomeBook.objects.filter(annual_flow__in=flows)
+
+            Income.objects.bulk_create(
+                [
+                    Income(
+                        book=book,
+                        description=f'Ingreso {index + 1}',
+                        amount=Decimal(rng.randrange(500_000, 2_000_000, 1_000))
+                    )
+                    for book in books
+                    for index in range(options['incomes_per_month'])
+                ],
+                batch_size=batch_size
+            )
+            incomes = Income.objects.filter(book__in=books).only('id', 'amount')
+
+            expenses_per_income = options['expenses_per_income']
+            expenses = []
+            expense_count = 0
+            for income in incomes.iterator(chunk_size=batch_size):
+                # Se reparte como máximo el 90% del ingreso para no dejar saldos negativos
+                share = income.amount * Decimal('0.9') / expenses_per_income
+                for index in range(expenses_per_income):
+                    expenses.append(Expense(
+                        income=income,
+                        category=rng.choice(categories),
+                        description=f'Gasto {index + 1}',
+                        amount=(share * Decimal(rng.uniform(0.2, 1))).quantize(Decimal('1'))
+                    ))
+                if len(expenses) >= batch_size:
+                    Expense.objects.bulk_create(expenses, batch_size=batch_size)
+                    expense_count += len(expenses)
+                    expenses = []
+            if expenses:
+                Expense.objects.bulk_create(expenses, batch_size=batch_size)
+                expense_count += len(expenses)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generados {len(years)} flujos, {books.count()} libros, '
+            f'{incomes.count()} ingresos y {expense_count} gastos'
+        ))
+
+    def _get_categories(self, count):
+        names = [f'Categoría {index + 1}' for index in range(count)]
+        existing = set(
+            ExpenseCategory.objects.filter(name__in=names).values_list('name', flat=True)
+        )
+        ExpenseCategory.objects.bulk_create(
+            [ExpenseCategory(name=name) for name in names if name not in existing]
+        )
+        return list(ExpenseCategory.objects.filter(name__in=names))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='presupuestoitem',
+            options={'ordering': ['orden', 'id']},
+        ),
+        migrations.AddField(
+            model_name='presupuestoitem',
+            name='orden',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0002_presupuestoitem_orden'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='annualflow',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='annualflow',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='monthlyincomebook',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='monthlyincomebook',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Exists, F, OuterRef, Sum
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
@@ -7,6 +7,8 @@ class AnnualFlow(models.Model):
     year = models.PositiveIntegerField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_closed = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         verbose_name = "Flujo Anual"
@@ -60,12 +62,32 @@ class MonthlyIncomeBook(models.Model):
     )
     month = models.IntegerField(choices=MONTH_CHOICES)
     is_closed = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         verbose_name = "Libro de Ingresos Mensual"
         verbose_name_plural = "Libros de Ingresos Mensuales"
         unique_together = ['annual_flow', 'month']
         ordering = ['month']
+
+    @classmethod
+    def bump_version(cls, book_ids):
+        """Marca los libros y sus flujos como modificados para invalidar sus ETags.
+
+        También marca el libro del mes siguiente, que muestra el remanente de
+        este como "Remanente anterior".
+        """
+        now = timezone.now()
+        changed = cls.objects.filter(pk__in=book_ids)
+        following = cls.objects.filter(Exists(
+            changed.filter(annual_flow=OuterRef('annual_flow'), month=OuterRef('month') - 1)
+        ))
+        (changed | following).update(version=F('version') + 1, updated_at=now)
+        AnnualFlow.objects.filter(income_books__in=book_ids).update(
+            version=F('version') + 1,
+            updated_at=now
+        )
     
     def get_total_income(self):
         """Obtiene solo los ingresos del mes"""
@@ -246,6 +268,7 @@ class PresupuestoItem(models.Model):
     descripcion = models.TextField(blank=True)
     costo = models.DecimalField(max_digits=10, decimal_places=2)
     is_cerrado = models.BooleanField(default=False)
+    orden = models.PositiveIntegerField(default=0)
     export_to = models.ForeignKey(
         Expense,
         on_delete=models.SET_NULL,
@@ -254,6 +277,9 @@ class PresupuestoItem(models.Model):
         related_name='presupuesto_items'
     )
 
+    class Meta:
+        ordering = ['orden', 'id']
+
     def export_to_expense(self, income):
         if not self.is_cerrado:
             expense = Expense.objects.create(
@@ -0,0 +1,50 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.signals import is_cascade
+
+from .models import AnnualFlow, Expense, ExpenseCategory, Income, MonthlyIncomeBook, Remnant
+
+# Cada escritura en el libro contable incrementa la versión del libro mensual y
+# de su flujo anual; las vistas de detalle y reportes derivan de ella su ETag.
+
+@receiver([post_save, post_delete], sender=Income)
+def income_changed(sender, instance, origin=None, **kwargs):
+    if not is_cascade(instance, origin):
+        MonthlyIncomeBook.bump_version([instance.book_id])
+
+@receiver([post_save, post_delete], sender=Expense)
+def expense_changed(sender, instance, origin=None, **kwargs):
+    if is_cascade(instance, origin):
+        return
+    book_id = Income.objects.filter(pk=instance.income_id).values_list('book_id', flat=True).first()
+    if book_id:
+        MonthlyIncomeBook.bump_version([book_id])
+
+@receiver([post_save, post_delete], sender=Remnant)
+def remnant_changed(sender, instance, origin=None, **kwargs):
+    if not is_cascade(instance, origin):
+        MonthlyIncomeBook.bump_version([instance.income_book_id])
+
+@receiver(post_save, sender=MonthlyIncomeBook)
+def book_changed(sender, instance, created, **kwargs):
+    if not created:
+        MonthlyIncomeBook.bump_version([instance.pk])
+
+@receiver(post_save, sender=AnnualFlow)
+def flow_changed(sender, instance, created, **kwargs):
+    if not created:
+        AnnualFlow.objects.filter(pk=instance.pk).update(
+            version=F('version') + 1,
+            updated_at=timezone.now()
+        )
+
+@receiver(post_save, sender=ExpenseCategory)
+def category_changed(sender, instance, created, **kwargs):
+    # Los nombres de categoría aparecen en el detalle de ingresos y en el reporte anual
+    if not created:
+        MonthlyIncomeBook.bump_version(
+            Income.objects.filter(expenses__category=instance).values('book_id')
+        )
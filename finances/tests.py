@@ -1,8 +1,18 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from decimal import Decimal
 from unittest.mock import patch
 
-from django.test import SimpleTestCase
-
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
 
+from finances.models import (
+    AnnualFlow, Expense, ExpenseCategory, Income, MonthlyIncomeBook, Presupuesto, PresupuestoItem, Remnant
+)
 from finances.templatetags.expense_filters import format_money
 
 
@@ -19,3 +29,237 @@ class FormatMoneyFilterTests(SimpleTestCase):
     def test_format_money_replaces_spaces_with_dots(self, mocked_number_format):
         self.assertEqual(format_money(50000), "50.000")
         mocked_number_format.assert_called_once()
+
+
+class FinanceViewTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='finanzas@example.com',
+            password='strong-password'
+        )
+        self.client.force_login(self.user)
+        self.flow = AnnualFlow.objects.create(year=2024)
+        self.book = MonthlyIncomeBook.objects.create(annual_flow=self.flow, month=3)
+        self.income = Income.objects.create(
+            book=self.book,
+            description='Sueldo',
+            amount=Decimal('1000')
+        )
+        self.category = ExpenseCategory.objects.create(name='Hogar')
+
+
+class ExpenseBulkViewTests(FinanceViewTestCase):
+    def _bulk_data(self, rows):
+        data = {
+            'expenses-TOTAL_FORMS': str(len(rows)),
+            'expenses-INITIAL_FORMS': '0',
+            'expenses-MIN_NUM_FORMS': '0',
+            'expenses-MAX_NUM_FORMS': '1000',
+        }
+        for index, (description, amount) in enumerate(rows):
+            data[f'expenses-{index}-category'] = str(self.category.pk) if description else ''
+            data[f'expenses-{index}-description'] = description
+            data[f'expenses-{index}-amount'] = amount
+        return data
+
+    def test_bulk_creates_all_filled_rows(self):
+        url = reverse('finances:add-expenses-bulk', args=[self.income.pk])
+        data = self._bulk_data([('Luz', '100'), ('Agua', '50'), ('', '')])
+
+        response = self.client.post(url, data)
+
+        self.assertRedirects(response, reverse('finances:income-detail', args=[self.income.pk]))
+        self.assertEqual(self.income.expenses.count(), 2)
+        self.assertEqual(self.income.get_current_balance(), Decimal('850'))
+
+    def test_bulk_over_balance_reports_row_errors_without_writes(self):
+        url = reverse('finances:add-expenses-bulk', args=[self.income.pk])
+        data = self._bulk_data([('Arriendo', '800'), ('Supermercado', '300')])
+
+        response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, 200)
+        formset = response.context['formset']
+        self.assertFalse(formset.forms[0].errors)
+        self.assertIn('amount', formset.forms[1].errors)
+        self.assertTrue(formset.non_form_errors())
+        self.assertFalse(Expense.objects.exists())
+
+
+class FinanceBenchmarkCommandTests(TestCase):
+    def test_seed_and_benchmark_write_report(self):
+        get_user_model().objects.create_user(email='bench@example.com', password='strong-password')
+        call_command(
+            'seed_finances', years=1, start_year=2020, incomes_per_month=1,
+            expenses_per_income=3, categories=2, seed=1, stdout=StringIO()
+        )
+
+        self.assertEqual(MonthlyIncomeBook.objects.filter(annual_flow__year=2020).count(), 12)
+        self.assertEqual(Expense.objects.count(), 36)
+        for income in Income.objects.all():
+            self.assertGreaterEqual(income.get_current_balance(), 0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, 'bench.json')
+            call_command('benchmark_finances', iterations=2, output=output, stdout=StringIO())
+            with open(output, encoding='utf-8') as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(report['dataset']['expenses'], 36)
+        self.assertEqual(report['results']['annual-report']['status_code'], 200)
+        self.assertIn('p95_ms', report['results']['income-detail'])
+
+
+class PresupuestoItemsBatchViewTests(FinanceViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.presupuesto = Presupuesto.objects.create(nombre='Vacaciones')
+        self.pasajes = PresupuestoItem.objects.create(presupuesto=self.presupuesto, nombre='Pasajes', costo=Decimal('300'))
+        self.hotel = PresupuestoItem.objects.create(presupuesto=self.presupuesto, nombre='Hotel', costo=Decimal('200'))
+        self.url = reverse('finances:presupuesto-items-batch', args=[self.presupuesto.pk])
+
+    def _post(self, operations):
+        return self.client.post(self.url, json.dumps({'operations': operations}), content_type='application/json')
+
+    def test_batch_applies_operations_and_returns_totals(self):
+        response = self._post([
+            {'op': 'create', 'nombre': 'Seguro', 'costo': '50'},
+            {'op': 'update', 'id': self.hotel.pk, 'costo': '250'},
+            {'op': 'delete', 'id': self.pasajes.pk},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(Decimal(data['total_cost']), Decimal('300'))
+        self.assertEqual([item['nombre'] for item in data['items']], ['Hotel', 'Seguro'])
+        self.assertFalse(PresupuestoItem.objects.filter(pk=self.pasajes.pk).exists())
+
+    def test_batch_reorders_items(self):
+        response = self._post([{'op': 'reorder', 'ids': [self.hotel.pk, self.pasajes.pk]}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.presupuesto.items.values_list('nombre', flat=True)), ['Hotel', 'Pasajes'])
+
+    def test_non_integer_ids_are_rejected(self):
+        for operations in [
+            [{'op': 'delete', 'id': [self.pasajes.pk]}],
+            [{'op': 'update', 'id': {'id': self.hotel.pk}, 'costo': '10'}],
+            [{'op': 'delete', 'id': True}],
+            [{'op': 'reorder', 'ids': [[self.hotel.pk], [self.pasajes.pk]]}],
+        ]:
+            with self.subTest(operations=operations):
+                response = self._post(operations)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['errors'][0]['index'], 0)
+        self.assertEqual(self.presupuesto.items.count(), 2)
+
+    def test_form_adds_item_after_reordered_items(self):
+        self._post([{'op': 'reorder', 'ids': [self.hotel.pk, self.pasajes.pk]}])
+        self.client.post(
+            reverse('finances:add-presupuesto-item', args=[self.presupuesto.pk]),
+            {'nombre': 'Seguro', 'costo': '50'}
+        )
+
+        self.assertEqual(
+            list(self.presupuesto.items.values_list('nombre', flat=True)), ['Hotel', 'Pasajes', 'Seguro']
+        )
+
+    def test_invalid_operation_rolls_back_whole_batch(self):
+        response = self._post([
+            {'op': 'delete', 'id': self.pasajes.pk},
+            {'op': 'create', 'nombre': 'Sin costo'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['index'], 1)
+        self.assertEqual(self.presupuesto.items.count(), 2)
+
+
+class FinanceSummaryApiTests(FinanceViewTestCase):
+    def setUp(self):
+        super().setUp()
+        Expense.objects.create(income=self.income, category=self.category, description='Luz', amount=Decimal('100'))
+        Expense.objects.create(income=self.income, category=self.category, description='Agua', amount=Decimal('50'))
+
+    async def test_flow_summary_groups_totals_by_month(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('finances:api-flow-summary', args=[self.flow.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(Decimal(data['total_expenses']), Decimal('150'))
+        self.assertEqual(data['months'][0]['month'], 3)
+        self.assertEqual(Decimal(data['months'][0]['balance']), Decimal('850'))
+
+    async def test_income_summary_groups_expenses_by_category(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('finances:api-income-summary', args=[self.income.pk]))
+
+        data = response.json()
+        self.assertEqual(Decimal(data['current_balance']), Decimal('850'))
+        self.assertEqual(data['expenses_count'], 2)
+        self.assertEqual(data['categories'][0]['name'], 'Hogar')
+
+    async def test_summary_requires_authentication(self):
+        response = await self.async_client.get(reverse('finances:api-monthly-book-summary', args=[self.book.pk]))
+        self.assertEqual(response.status_code, 401)
+
+
+class LedgerConditionalGetTests(FinanceViewTestCase):
+    def test_unchanged_pages_return_not_modified(self):
+        urls = [
+            reverse('finances:flow-detail', args=[self.flow.pk]),
+            reverse('finances:monthly-book-detail', args=[self.book.pk]),
+            reverse('finances:income-detail', args=[self.income.pk]),
+            reverse('finances:annual-report', args=[self.flow.pk]),
+        ]
+        # La primera visita emite la cookie CSRF, que forma parte del ETag
+        self.client.get(urls[0])
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('private', response['Cache-Control'])
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+
+    def test_ledger_write_invalidates_etag(self):
+        url = reverse('finances:income-detail', args=[self.income.pk])
+        etag = self.client.get(url)['ETag']
+
+        Expense.objects.create(income=self.income, category=self.category, description='Luz', amount=Decimal('10'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_closing_previous_month_invalidates_book_etag(self):
+        previous = MonthlyIncomeBook.objects.create(annual_flow=self.flow, month=2)
+        url = reverse('finances:monthly-book-detail', args=[self.book.pk])
+        self.client.get(url)
+        etag = self.client.get(url)['ETag']
+
+        previous.is_closed = True
+        previous.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        Remnant.objects.create(income_book=previous, amount=Decimal('150'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '150')
+
+    def test_bulk_expenses_bump_flow_version(self):
+        version = self.flow.version
+        url = reverse('finances:add-expenses-bulk', args=[self.income.pk])
+        self.client.post(url, {
+            'expenses-TOTAL_FORMS': '1',
+            'expenses-INITIAL_FORMS': '0',
+            'expenses-0-category': str(self.category.pk),
+            'expenses-0-description': 'Gas',
+            'expenses-0-amount': '20',
+        })
+
+        self.flow.refresh_from_db()
+        self.assertGreater(self.flow.version, version)
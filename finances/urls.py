@@ -55,6 +55,9 @@ urlpatterns = [
     path('income/<int:income_id>/add-expense/',
          views.add_expense,
          name='add-expense'),
+    path('income/<int:income_id>/add-expenses/',
+         views.add_expenses_bulk,
+         name='add-expenses-bulk'),
     path('expense/<int:pk>/delete/',
          views.delete_expense,
          name='delete-expense'),
@@ -78,6 +81,17 @@ urlpatterns = [
          views.annual_report, 
          name='annual-report'),
     
+    # API asíncrona
+    path('api/flow/<int:pk>/summary/',
+         views.flow_summary_api,
+         name='api-flow-summary'),
+    path('api/monthly/<int:pk>/summary/',
+         views.monthly_book_summary_api,
+         name='api-monthly-book-summary'),
+    path('api/income/<int:pk>/summary/',
+         views.income_summary_api,
+         name='api-income-summary'),
+    
     # Presupuesto
     path('presupuestos/', 
          views.PresupuestoListView.as_view(), 
@@ -95,6 +109,10 @@ urlpatterns = [
          views.add_presupuesto_item,
          name='add-presupuesto-item'),
     
+    path('presupuestos/<int:presupuesto_id>/items/batch/',
+         views.presupuesto_items_batch,
+         name='presupuesto-items-batch'),
+    
     path('presupuesto-item/<int:item_id>/export/<str:income_ids>/',
          views.export_to_expense,
          name='export-presupuesto-item'),
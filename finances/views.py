@@ -1,23 +1,85 @@
+import hashlib
+import json
+from functools import wraps
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, CreateView, DetailView, DeleteView, UpdateView
 from django.contrib import messages
 from django.urls import reverse_lazy 
-from django.db.models import F, Sum, OuterRef, Subquery, DecimalField
+from django.db.models import F, Max, Sum, OuterRef, Subquery, DecimalField
 from django.db.models.functions import Coalesce
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
+from django.forms.models import model_to_dict
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
 from .models import (
     AnnualFlow, MonthlyIncomeBook, Income, ExpenseCategory, 
     Expense, Remnant, RemnantWithdrawal, Presupuesto, PresupuestoItem
 )
 from .forms import (
-    AnnualFlowForm, IncomeForm, ExpenseCategoryForm, ExpenseForm, 
+    AnnualFlowForm, IncomeForm, ExpenseCategoryForm, ExpenseForm, ExpenseBulkFormSet,
     RemnantWithdrawalForm, PresupuestoForm, PresupuestoItemForm
 )
 
+# ==================== CACHÉ CONDICIONAL ====================
+
+def ledger_conditional(get_state):
+    """Responde 304 cuando la versión del libro contable no cambió.
+
+    ``get_state(request, **kwargs)`` devuelve ``(clave, updated_at)`` con la
+    versión del flujo o libro que respalda la página, o ``None`` si no existe.
+    La clave se combina con el usuario y el secreto CSRF porque ambos se
+    renderizan en la página.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, '_ledger_state'):
+            # Si hay mensajes pendientes la página debe renderizarse para mostrarlos
+            pending_messages = len(messages.get_messages(request))
+            request._ledger_state = None if pending_messages else get_state(request, **kwargs)
+        return request._ledger_state
+
+    def etag_func(request, *args, **kwargs):
+        current = state(request, *args, **kwargs)
+        if current is None:
+            return None
+        csrf_secret = request.META.get('CSRF_COOKIE', '')
+        session = hashlib.sha256(f'{request.user.pk}:{csrf_secret}'.encode()).hexdigest()[:12]
+        return f'{current[0]}-{session}'
+
+    def last_modified_func(request, *args, **kwargs):
+        current = state(request, *args, **kwargs)
+        return None if current is None else current[1]
+
+    def decorator(view_func):
+        view_func = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+        return cache_control(private=True, no_cache=True)(view_func)
+    return decorator
+
+def _flow_state(request, pk=None, flow_id=None):
+    flow = AnnualFlow.objects.filter(pk=pk or flow_id).values('version', 'updated_at').first()
+    if flow is None:
+        return None
+    # El detalle resalta el mes en curso, así que la página también cambia con él
+    return f"flow-{pk or flow_id}-v{flow['version']}-m{timezone.now().month}", flow['updated_at']
+
+def _book_state(request, pk):
+    book = MonthlyIncomeBook.objects.filter(pk=pk).values('version', 'updated_at').first()
+    if book is None:
+        return None
+    return f"book-{pk}-v{book['version']}", book['updated_at']
+
+def _income_state(request, pk):
+    income = Income.objects.filter(pk=pk).values('book__version', 'book__updated_at').first()
+    if income is None:
+        return None
+    return f"income-{pk}-v{income['book__version']}", income['book__updated_at']
+
 # ==================== FLUJOS ANUALES ====================
 
 class AnnualFlowListView(LoginRequiredMixin, ListView):
@@ -26,6 +88,7 @@ class AnnualFlowListView(LoginRequiredMixin, ListView):
     context_object_name = 'flows'
     ordering = ['-year']
 
+@method_decorator(ledger_conditional(_flow_state), name='get')
 class AnnualFlowDetailView(LoginRequiredMixin, DetailView):
     model = AnnualFlow
     template_name = 'finances/annual_flow_detail.html'
@@ -73,6 +136,7 @@ class AnnualFlowDeleteView(LoginRequiredMixin, DeleteView):
 
 # ==================== LIBROS MENSUALES ====================
 
+@method_decorator(ledger_conditional(_book_state), name='get')
 class MonthlyBookDetailView(LoginRequiredMixin, DetailView):
     model = MonthlyIncomeBook
     template_name = 'finances/monthly_book_detail.html'
@@ -182,6 +246,7 @@ def add_income(request, book_id):
         'book': book
     })
 
+@method_decorator(ledger_conditional(_income_state), name='get')
 class IncomeDetailView(LoginRequiredMixin, DetailView):
     model = Income
     template_name = 'finances/income_detail.html'
@@ -300,6 +365,46 @@ def add_expense(request, income_id):
         'available_balance': income.get_current_balance()
     })
 
+@login_required
+def add_expenses_bulk(request, income_id):
+    income = get_object_or_404(Income.objects.select_related('book'), id=income_id)
+
+    if income.book.is_closed:
+        messages.error(request, 'No se pueden agregar gastos a un ingreso de un mes cerrado.')
+        return redirect('finances:income-detail', pk=income_id)
+
+    available_balance = income.get_current_balance()
+
+    if request.method == 'POST':
+        formset = ExpenseBulkFormSet(
+            request.POST,
+            prefix='expenses',
+            available_balance=available_balance
+        )
+        if formset.is_valid():
+            expenses = []
+            for form in formset.get_filled_forms():
+                expense = form.save(commit=False)
+                expense.income = income
+                expenses.append(expense)
+
+            with transaction.atomic():
+                Expense.objects.bulk_create(expenses)
+                # bulk_create no emite señales, así que la versión se incrementa aquí
+                MonthlyIncomeBook.bump_version([income.book_id])
+
+            messages.success(request, f'{len(expenses)} gastos registrados exitosamente.')
+            return redirect('finances:income-detail', pk=income_id)
+        messages.error(request, 'No se registró ningún gasto. Corrige los errores del lote.')
+    else:
+        formset = ExpenseBulkFormSet(prefix='expenses', available_balance=available_balance)
+
+    return render(request, 'finances/expense_bulk_form.html', {
+        'formset': formset,
+        'income': income,
+        'available_balance': available_balance
+    })
+
 @login_required
 def delete_expense(request, pk):
     expense = get_object_or_404(Expense, id=pk)
@@ -385,6 +490,7 @@ def withdraw_remnant(request, flow_id):
 # ==================== REPORTES ====================
 
 @login_required
+@ledger_conditional(_flow_state)
 def annual_report(request, flow_id):
     flow = get_object_or_404(AnnualFlow, id=flow_id)
     months_names = dict(MonthlyIncomeBook.MONTH_CHOICES)
@@ -436,6 +542,127 @@ def annual_report(request, flow_id):
         'total_expenses': flow.get_total_expenses()
     })
 
+# ==================== API ASÍNCRONA ====================
+
+def async_login_required(view_func):
+    """Equivalente de login_required para vistas async que responden JSON"""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+@async_login_required
+async def flow_summary_api(request, pk):
+    flow = await AnnualFlow.objects.filter(pk=pk).afirst()
+    if flow is None:
+        return JsonResponse({'error': 'Flow not found'}, status=404)
+
+    incomes_by_month = {
+        row['book__month']: row['total']
+        async for row in Income.objects.filter(book__annual_flow=flow)
+        .values('book__month').annotate(total=Sum('amount'))
+    }
+    expenses_by_month = {
+        row['income__book__month']: row['total']
+        async for row in Expense.objects.filter(income__book__annual_flow=flow)
+        .values('income__book__month').annotate(total=Sum('amount'))
+    }
+    remnants = await Remnant.objects.filter(
+        income_book__annual_flow=flow
+    ).aaggregate(total=Sum('amount'))
+
+    months_names = dict(MonthlyIncomeBook.MONTH_CHOICES)
+    months = []
+    async for book in flow.income_books.values('id', 'month', 'is_closed'):
+        incomes = incomes_by_month.get(book['month']) or 0
+        expenses = expenses_by_month.get(book['month']) or 0
+        months.append({
+            'id': book['id'],
+            'month': book['month'],
+            'name': months_names[book['month']],
+            'is_closed': book['is_closed'],
+            'incomes': incomes,
+            'expenses': expenses,
+            'balance': incomes - expenses
+        })
+
+    total_income = sum(incomes_by_month.values())
+    total_expenses = sum(expenses_by_month.values())
+    return JsonResponse({
+        'id': flow.id,
+        'year': flow.year,
+        'is_closed': flow.is_closed,
+        'closed_month_count': await flow.income_books.filter(is_closed=True).acount(),
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'accumulated_remnant': remnants['total'] or 0,
+        'months': months
+    })
+
+@async_login_required
+async def monthly_book_summary_api(request, pk):
+    book = await MonthlyIncomeBook.objects.select_related('annual_flow').filter(pk=pk).afirst()
+    if book is None:
+        return JsonResponse({'error': 'Book not found'}, status=404)
+
+    incomes = []
+    async for income in book.incomes.annotate(
+        total_expenses=Sum('expenses__amount'),
+        expenses_count=models.Count('expenses')
+    ).order_by('-date'):
+        total_expenses = income.total_expenses or 0
+        incomes.append({
+            'id': income.id,
+            'description': income.description,
+            'amount': income.amount,
+            'total_expenses': total_expenses,
+            'current_balance': income.amount - total_expenses,
+            'expenses_count': income.expenses_count
+        })
+
+    total_incomes = sum(income['amount'] for income in incomes)
+    total_expenses = sum(income['total_expenses'] for income in incomes)
+    return JsonResponse({
+        'id': book.id,
+        'year': book.annual_flow.year,
+        'month': book.month,
+        'name': book.get_month_display(),
+        'is_closed': book.is_closed,
+        'total_incomes': total_incomes,
+        'total_expenses': total_expenses,
+        'balance': total_incomes - total_expenses,
+        'incomes': incomes
+    })
+
+@async_login_required
+async def income_summary_api(request, pk):
+    income = await Income.objects.filter(pk=pk).afirst()
+    if income is None:
+        return JsonResponse({'error': 'Income not found'}, status=404)
+
+    categories = [
+        {'id': row['category'], 'name': row['category__name'], 'total': row['total'], 'count': row['count']}
+        async for row in income.expenses.values('category', 'category__name').annotate(
+            total=Sum('amount'),
+            count=models.Count('id')
+        ).order_by('category__name')
+    ]
+
+    total_expenses = sum(category['total'] for category in categories)
+    return JsonResponse({
+        'id': income.id,
+        'book_id': income.book_id,
+        'description': income.description,
+        'amount': income.amount,
+        'total_expenses': total_expenses,
+        'current_balance': income.amount - total_expenses,
+        'expenses_count': sum(category['count'] for category in categories),
+        'categories': categories
+    })
+
 # ==================== PRESUPUESTOS ====================
 
 class PresupuestoListView(LoginRequiredMixin, ListView):
@@ -496,6 +723,8 @@ def add_presupuesto_item(request, presupuesto_id):
         if form.is_valid():
             item = form.save(commit=False)
             item.presupuesto = presupuesto
+            # Los items nuevos van al final, como en la operación "create" del lote
+            item.orden = (presupuesto.items.aggregate(orden=Max('orden'))['orden'] or 0) + 1
             item.save()
             return redirect('finances:presupuesto-detail', pk=presupuesto_id)
     else:
@@ -532,6 +761,125 @@ def delete_presupuesto_item(request, pk):
     
     return redirect('finances:presupuesto-detail', pk=presupuesto_id)
 
+PRESUPUESTO_ITEM_FIELDS = ['nombre', 'url', 'descripcion', 'costo']
+
+def _is_item_id(value):
+    """Los ids del JSON deben ser enteros; ``True`` es un ``int`` pero no un id"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _serialize_presupuesto_item(item):
+    return {
+        'id': item.id,
+        'nombre': item.nombre,
+        'url': item.url,
+        'descripcion': item.descripcion,
+        'costo': item.costo,
+        'is_cerrado': item.is_cerrado,
+        'orden': item.orden
+    }
+
+@login_required
+@require_POST
+def presupuesto_items_batch(request, presupuesto_id):
+    """Aplica en una sola transacción un lote de operaciones sobre los items de un presupuesto.
+
+    Espera un JSON ``{"operations": [...]}`` donde cada operación es
+    ``{"op": "create", ...campos}``, ``{"op": "update", "id": N, ...campos}``,
+    ``{"op": "delete", "id": N}`` o ``{"op": "reorder", "ids": [N, ...]}``.
+    Si alguna operación es inválida no se escribe nada.
+    """
+    presupuesto = get_object_or_404(Presupuesto, id=presupuesto_id)
+
+    try:
+        operations = json.loads(request.body)['operations']
+        if not isinstance(operations, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Invalid JSON payload'}, status=400)
+
+    items = {item.id: item for item in presupuesto.items.all()}
+    next_orden = max((item.orden for item in items.values()), default=0) + 1
+    to_create = []
+    to_update = {}
+    to_delete = set()
+    errors = []
+
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            errors.append({'index': index, 'errors': {'op': ['Operación inválida']}})
+            continue
+
+        op = operation.get('op')
+        fields = {key: operation[key] for key in PRESUPUESTO_ITEM_FIELDS if key in operation}
+
+        if op == 'create':
+            form = PresupuestoItemForm(fields)
+            if form.is_valid():
+                item = form.save(commit=False)
+                item.presupuesto = presupuesto
+                item.orden = next_orden
+                next_orden += 1
+                to_create.append(item)
+            else:
+                errors.append({'index': index, 'errors': form.errors})
+            continue
+
+        if op == 'reorder':
+            ids = operation.get('ids')
+            if (
+                not isinstance(ids, list) or not all(_is_item_id(item_id) for item_id in ids)
+                or set(ids) != set(items) - to_delete or len(ids) != len(set(ids))
+            ):
+                errors.append({'index': index, 'errors': {'ids': ['Debe incluir todos los items del presupuesto una sola vez']}})
+                continue
+            for position, item_id in enumerate(ids, start=1):
+                item = to_update.setdefault(item_id, items[item_id])
+                item.orden = position
+            continue
+
+        if op not in ('update', 'delete'):
+            errors.append({'index': index, 'errors': {'op': [f'Operación desconocida: {op}']}})
+            continue
+
+        item_id = operation.get('id')
+        item = items.get(item_id) if _is_item_id(item_id) else None
+        if item is None or item.id in to_delete:
+            errors.append({'index': index, 'errors': {'id': ['Item no encontrado en este presupuesto']}})
+        elif item.is_cerrado:
+            errors.append({'index': index, 'errors': {'id': ['No se puede modificar un item exportado']}})
+        elif op == 'delete':
+            to_delete.add(item.id)
+            to_update.pop(item.id, None)
+        else:
+            form = PresupuestoItemForm(
+                {**model_to_dict(item, fields=PRESUPUESTO_ITEM_FIELDS), **fields},
+                instance=item
+            )
+            if form.is_valid():
+                to_update[item.id] = form.save(commit=False)
+            else:
+                errors.append({'index': index, 'errors': form.errors})
+
+    if errors:
+        return JsonResponse({'status': 'error', 'errors': errors}, status=400)
+
+    with transaction.atomic():
+        if to_delete:
+            presupuesto.items.filter(id__in=to_delete).delete()
+        if to_create:
+            PresupuestoItem.objects.bulk_create(to_create)
+        if to_update:
+            PresupuestoItem.objects.bulk_update(
+                to_update.values(),
+                fields=PRESUPUESTO_ITEM_FIELDS + ['orden']
+            )
+
+    return JsonResponse({
+        'status': 'success',
+        'items': [_serialize_presupuesto_item(item) for item in presupuesto.items.all()],
+        'total_cost': presupuesto.get_total_cost()
+    })
+
 @login_required
 def export_to_expense(request, item_id, income_ids):
     item = get_object_or_404(PresupuestoItem, id=item_id)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WeightRecord, BodyMeasurement, ProgressPhoto
+from .models import WeightRecord, WeightRollup, BodyMeasurement, PhotoBlob, ProgressPhoto, TrackingSummary
 
 @admin.register(WeightRecord)
 class WeightRecordAdmin(admin.ModelAdmin):
@@ -9,6 +9,12 @@ class WeightRecordAdmin(admin.ModelAdmin):
     ordering = ['-date']
     date_hierarchy = 'date'
 
+@admin.register(WeightRollup)
+class WeightRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'period', 'year', 'number', 'count', 'min_weight', 'max_weight']
+    list_filter = ['period', 'year', 'user']
+    readonly_fields = ['count', 'total', 'min_weight', 'max_weight']
+
 @admin.register(BodyMeasurement)
 class BodyMeasurementAdmin(admin.ModelAdmin):
     list_display = ['user', 'date', 'chest', 'waist', 'hips', 'arms', 'thighs']
@@ -19,8 +25,23 @@ class BodyMeasurementAdmin(admin.ModelAdmin):
 
 @admin.register(ProgressPhoto)
 class ProgressPhotoAdmin(admin.ModelAdmin):
-    list_display = ['user', 'date', 'photo_type', 'photo']
-    list_filter = ['date', 'photo_type', 'user']
+    list_display = ['user', 'date', 'photo_type', 'photo', 'status', 'attempts']
+    list_filter = ['date', 'photo_type', 'status', 'user']
     search_fields = ['user__email', 'notes']
+    readonly_fields = ['status', 'attempts', 'available_at', 'last_error', 'renditions']
     ordering = ['-date']
-    date_hierarchy = 'date'
\ No newline at end of file
+    date_hierarchy = 'date'
+
+@admin.register(PhotoBlob)
+class PhotoBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'name', 'size', 'ref_count', 'created_at']
+    search_fields = ['sha256', 'name']
+    readonly_fields = ['sha256', 'name', 'size', 'ref_count', 'created_at']
+
+@admin.register(TrackingSummary)
+class TrackingSummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'latest_weight', 'latest_weight_date', 'measurement_count', 'photo_count', 'updated_at']
+    search_fields = ['user__email']
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
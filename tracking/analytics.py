@@ -0,0 +1,124 @@
+from bisect import bisect_right
+from math import fsum, sqrt
+
+from .history import MEASUREMENT_FIELDS
+from .models import BodyMeasurement
+from .series import load_series
+from .trends import fit_line
+
+CORRELATION_WINDOW = 8
+MIN_CORRELATION_WINDOW = 3
+MAX_CORRELATION_WINDOW = 52
+# Un peso más antiguo que esto no representa el día de la medición
+MAX_WEIGHT_GAP_DAYS = 7
+
+
+def asof_join(dates, right_dates, right_values, tolerance_days=MAX_WEIGHT_GAP_DAYS):
+    """Para cada fecha, el último valor de la derecha en esa fecha o antes; ``None`` si no hay.
+
+    Ambas secuencias vienen ordenadas, así que cada búsqueda es binaria sobre
+    las fechas de la derecha y no hace falta una consulta por fecha.
+    """
+    joined = []
+    for date in dates:
+        index = bisect_right(right_dates, date) - 1
+        if index >= 0 and (date - right_dates[index]).days <= tolerance_days:
+            joined.append(right_values[index])
+        else:
+            joined.append(None)
+    return joined
+
+
+def _pearson(xs, ys):
+    """Correlación con sumas centradas; ``None`` si alguna serie no varía en la ventana"""
+    if min(xs) == max(xs) or min(ys) == max(ys):
+        return None
+    mean_x = fsum(xs) / len(xs)
+    mean_y = fsum(ys) / len(ys)
+    dxs = [x - mean_x for x in xs]
+    dys = [y - mean_y for y in ys]
+    cov = fsum(dx * dy for dx, dy in zip(dxs, dys))
+    var_x = fsum(dx * dx for dx in dxs)
+    var_y = fsum(dy * dy for dy in dys)
+    return round(max(-1.0, min(1.0, cov / sqrt(var_x * var_y))), 4)
+
+
+def rolling_correlation(xs, ys, window):
+    """Correlación de Pearson sobre ventanas deslizantes de ``window`` pares.
+
+    Cada ventana se centra en su propia media en lugar de restar sumas
+    acumuladas: con medidas casi constantes la resta dejaría una varianza
+    residual y una correlación sin sentido. La ventana está acotada por
+    ``MAX_CORRELATION_WINDOW``, así que el costo sigue siendo lineal en la
+    serie. El resultado empieza en el par ``window - 1``.
+    """
+    return [
+        _pearson(xs[end - window:end], ys[end - window:end])
+        for end in range(window, len(xs) + 1)
+    ]
+
+
+def correlation(xs, ys):
+    return _pearson(xs, ys) if len(xs) >= MIN_CORRELATION_WINDOW else None
+
+
+def waist_to_hip(dates, waists, hips):
+    """Serie del índice cintura/cadera y su cambio mensual según la recta de mínimos cuadrados"""
+    points = [
+        (date, waist / hip)
+        for date, waist, hip in zip(dates, waists, hips)
+        if waist is not None and hip
+    ]
+    payload = {
+        'dates': [date.strftime('%Y-%m-%d') for date, _ in points],
+        'values': [round(ratio, 4) for _, ratio in points],
+        'latest': round(points[-1][1], 4) if points else None,
+        'monthly_change': None,
+    }
+    if len(points) >= 2:
+        first = points[0][0]
+        line = fit_line([(date - first).days for date, _ in points], [ratio for _, ratio in points])
+        if line:
+            payload['monthly_change'] = round(line[0] * 30, 5)
+    return payload
+
+
+def body_composition(user, window=CORRELATION_WINDOW):
+    """Relación entre el peso y cada medida, alineados en las fechas de medición.
+
+    Dos consultas: la serie de peso y las medidas. A cada medición se le asigna
+    el último peso registrado hasta esa fecha y se calculan las correlaciones
+    móviles de cada medida con el peso, más el índice cintura/cadera.
+    """
+    weight_dates, weights = load_series(user, 'weight')
+    rows = list(BodyMeasurement.objects.filter(user=user).order_by('date', 'id').values_list(
+        'date', *MEASUREMENT_FIELDS
+    ))
+    dates = [row[0] for row in rows]
+    columns = dict(zip(MEASUREMENT_FIELDS, zip(*[row[1:] for row in rows]))) if rows else {
+        field: () for field in MEASUREMENT_FIELDS
+    }
+    aligned_weights = asof_join(dates, weight_dates, weights)
+
+    correlations = {}
+    for field in MEASUREMENT_FIELDS:
+        pairs = [
+            (date, weight, value)
+            for date, weight, value in zip(dates, aligned_weights, columns[field])
+            if weight is not None and value is not None
+        ]
+        xs = [weight for _, weight, _ in pairs]
+        ys = [value for _, _, value in pairs]
+        correlations[field] = {
+            'overall': correlation(xs, ys),
+            'dates': [date.strftime('%Y-%m-%d') for date, _, _ in pairs[window - 1:]],
+            'values': rolling_correlation(xs, ys, window),
+        }
+
+    return {
+        'window': window,
+        'dates': [date.strftime('%Y-%m-%d') for date in dates],
+        'weight': aligned_weights,
+        'correlations': correlations,
+        'waist_to_hip': waist_to_hip(dates, columns['waist'], columns['hips']),
+    }
@@ -0,0 +1,89 @@
+import calendar
+from datetime import date
+from functools import lru_cache
+
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+from .models import ProgressPhoto
+
+# Semanas de lunes a domingo, como en la cabecera de los calendarios
+_calendar = calendar.Calendar(firstweekday=calendar.MONDAY)
+# Tonos del mapa de calor: 0 sin fotos, 3 para una sesión completa o más
+HEAT_LEVELS = 3
+
+
+@lru_cache(maxsize=256)
+def month_weeks(year, month):
+    """Semanas del mes como tuplas de 7 fechas, con ``None`` en los días de otros meses.
+
+    El resultado es inmutable y solo depende de ``(year, month)``, así que se
+    calcula una vez por proceso y lo comparten todas las vistas de calendario.
+    """
+    return tuple(
+        tuple(day if day.month == month else None for day in week)
+        for week in _calendar.monthdatescalendar(year, month)
+    )
+
+
+def month_bounds(year, month):
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def year_bounds(year):
+    return date(year, 1, 1), date(year, 12, 31)
+
+
+def _user_photos(user, photo_type=None):
+    photos = ProgressPhoto.objects.filter(user=user)
+    if photo_type:
+        photos = photos.filter(photo_type=photo_type)
+    return photos
+
+
+def photo_counts(user, start, end, photo_type=None):
+    """Cantidad de fotos por día entre ``start`` y ``end`` con una sola consulta agrupada"""
+    return dict(
+        _user_photos(user, photo_type).filter(date__range=(start, end))
+        .values('date').annotate(count=Count('id')).order_by()
+        .values_list('date', 'count')
+    )
+
+
+def photo_months(user, photo_type=None):
+    """Meses con fotos, del más reciente al más antiguo, como ``[(primer día, cantidad), ...]``"""
+    return list(
+        _user_photos(user, photo_type).annotate(month=TruncMonth('date'))
+        .values('month').annotate(count=Count('id')).order_by('-month')
+        .values_list('month', 'count')
+    )
+
+
+def month_calendar(year, month, counts):
+    """Semanas listas para la plantilla con la cantidad de fotos de cada día"""
+    return [
+        [
+            {
+                'day': day.day,
+                'date': day,
+                'has_photos': day in counts,
+                'photo_count': counts.get(day, 0),
+                'level': min(counts.get(day, 0), HEAT_LEVELS),
+            } if day else {'day': '', 'has_photos': False}
+            for day in week
+        ]
+        for week in month_weeks(year, month)
+    ]
+
+
+def year_calendar(year, counts):
+    """Los doce meses del año con sus semanas y el total de fotos de cada uno"""
+    months = []
+    for month in range(1, 13):
+        start, end = month_bounds(year, month)
+        months.append({
+            'first_day': start,
+            'weeks': month_calendar(year, month, counts),
+            'total': sum(count for day, count in counts.items() if start <= day <= end),
+        })
+    return months
@@ -0,0 +1,148 @@
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
+from django.db.models.functions import Collate
+from django.utils import timezone
+
+from .models import PhotoBlob, ProgressPhoto
+from .renditions import RENDITION_SIZES
+
+logger = logging.getLogger(__name__)
+
+# Un solo hilo: los borrados se aplican en orden y sin competir con las peticiones
+_deleter = ThreadPoolExecutor(max_workers=1, thread_name_prefix='media-delete')
+
+# Colación que ordena por código de carácter, igual que la comparación de str en Python
+BINARY_COLLATIONS = {
+    'sqlite': 'BINARY',
+    'postgresql': 'C',
+}
+
+
+def is_referenced(name):
+    """Indica si alguna fila usa todavía el archivo, como original o como versión reducida"""
+    renditions = Q()
+    for label in RENDITION_SIZES:
+        renditions |= Q(**{f'renditions__{label}__name': name})
+    return (
+        PhotoBlob.objects.filter(name=name).exists()
+        or ProgressPhoto.objects.filter(Q(photo=name) | renditions).exists()
+    )
+
+
+def _delete_files(storage, names, queued_at):
+    """Borra los archivos que nadie volvió a usar desde que se encolaron.
+
+    Entre el commit y este momento el mismo contenido pudo subirse de nuevo:
+    se conservan los archivos que ya tienen otra referencia o que se
+    reescribieron después de encolar el borrado (aunque su fila aún no se
+    haya confirmado). Si quedan huérfanos, ``gc_media`` los recoge después.
+    """
+    try:
+        for name in names:
+            try:
+                if is_referenced(name) or (
+                    storage.exists(name) and storage.get_modified_time(name) >= queued_at
+                ):
+                    continue
+                storage.delete(name)
+            except Exception:
+                logger.exception('No se pudo eliminar %s', name)
+    finally:
+        close_old_connections()
+
+
+def delete_files_on_commit(storage, names):
+    """Borra los archivos después del commit y fuera del hilo de la petición.
+
+    Si la transacción se revierte, los archivos se conservan.
+    """
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: _deleter.submit(_delete_files, storage, names, timezone.now()))
+
+
+def flush_deletions():
+    """Espera a que terminen los borrados encolados hasta ahora"""
+    _deleter.submit(lambda: None).result()
+
+
+def walk_storage(storage, path):
+    """Nombres de archivo bajo ``path`` en orden de ``str``, recorriendo un directorio a la vez.
+
+    Cada directorio se ordena con la clave ``nombre + '/'``; así el recorrido
+    sale en el mismo orden que la lista completa de rutas ordenada, sin
+    tenerla en memoria.
+    """
+    try:
+        directories, files = storage.listdir(path)
+    except FileNotFoundError:
+        return
+    entries = [(f'{name}/', True) for name in directories] + [(name, False) for name in files]
+    for key, is_directory in sorted(entries):
+        name = f'{path}/{key}' if path else key
+        if is_directory:
+            yield from walk_storage(storage, name.rstrip('/'))
+        else:
+            yield name
+
+
+def _sorted_names(queryset, expression, prefix):
+    collation = BINARY_COLLATIONS.get(connection.vendor)
+    ordering = Collate('media_name', collation) if collation else 'media_name'
+    return queryset.annotate(media_name=expression).filter(
+        media_name__startswith=prefix
+    ).order_by(ordering).values_list('media_name', flat=True).iterator(chunk_size=2000)
+
+
+def referenced_names(prefix):
+    """Rutas referenciadas por la base, ordenadas y sin repetir.
+
+    Combina con ``heapq.merge`` varias consultas ya ordenadas en SQL: fotos,
+    archivos por contenido y cada tipo de versión reducida.
+    """
+    streams = [
+        _sorted_names(ProgressPhoto.objects.all(), F('photo'), prefix),
+        _sorted_names(PhotoBlob.objects.all(), F('name'), prefix),
+    ]
+    for label in RENDITION_SIZES:
+        streams.append(_sorted_names(ProgressPhoto.objects.all(), KT(f'renditions__{label}__name'), prefix))
+
+    previous = None
+    for name in heapq.merge(*streams):
+        if previous is not None and name < previous:
+            raise ValueError('La base no devolvió las rutas en orden binario')
+        if name != previous:
+            yield name
+        previous = name
+
+
+def orphaned_names(storage, prefix):
+    """Archivos del storage sin referencia en la base: diferencia de dos secuencias ordenadas"""
+    referenced = referenced_names(prefix)
+    current = next(referenced, None)
+    for name in walk_storage(storage, prefix):
+        while current is not None and current < name:
+            current = next(referenced, None)
+        if name != current:
+            yield name
+
+
+def collect_orphans(storage, prefix='progress_photos', min_age=timedelta(hours=1), dry_run=False):
+    """Elimina (o solo lista con ``dry_run``) los archivos huérfanos con más de ``min_age``.
+
+    La antigüedad mínima evita borrar un archivo recién subido cuya fila aún
+    no se ha confirmado.
+    """
+    cutoff = timezone.now() - min_age
+    for name in orphaned_names(storage, prefix):
+        if storage.get_modified_time(name) > cutoff:
+            continue
+        if not dry_run:
+            storage.delete(name)
+        yield name
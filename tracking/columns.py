@@ -0,0 +1,46 @@
+from array import array
+from itertools import compress
+from math import isnan, nan
+
+from .history import MEASUREMENT_FIELDS
+from .models import BodyMeasurement
+from .series import series_payload
+
+
+class MeasurementColumns:
+    """Medidas de un usuario guardadas por columnas para la gráfica.
+
+    Recibe filas ``(date, *MEASUREMENT_FIELDS)`` en orden cronológico (una sola
+    consulta ``values_list``) y las transpone a un arreglo por medida con
+    ``nan`` en los valores vacíos. Solo alimenta la gráfica: la tabla y sus
+    cambios se paginan en SQL con ``measurement_history_page``.
+    """
+
+    def __init__(self, rows, fields=MEASUREMENT_FIELDS):
+        self.fields = list(fields)
+        columns = list(zip(*rows)) or [()] * (1 + len(self.fields))
+        self.dates = list(columns[0])
+        self.values = {
+            field: array('d', (nan if value is None else value for value in column))
+            for field, column in zip(self.fields, columns[1:])
+        }
+
+    @classmethod
+    def for_user(cls, user):
+        """Todas las medidas del usuario en una sola consulta, como las lee la vista"""
+        return cls(
+            BodyMeasurement.objects.filter(user=user).order_by('date', 'id').values_list(
+                'date', *MEASUREMENT_FIELDS
+            )
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+    def series(self, field):
+        """Fechas y valores no vacíos de una medida"""
+        present = [not isnan(value) for value in self.values[field]]
+        return list(compress(self.dates, present)), array('d', compress(self.values[field], present))
+
+    def chart_data(self, points):
+        return {field: series_payload(*self.series(field), points) for field in self.fields}
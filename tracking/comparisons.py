@@ -0,0 +1,89 @@
+import hashlib
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageChops, ImageOps
+
+from .models import ProgressPhoto
+from .renditions import encode_image, prepare_image, rendition_format
+
+COMPARE_MODES = [
+    ('side', 'Lado a lado'),
+    ('overlay', 'Superpuesta'),
+    ('diff', 'Diferencias'),
+]
+COMPARE_HEIGHT = 960
+MIN_COMPARE_HEIGHT = 160
+# prepare_image decodifica los originales a esta escala como máximo
+MAX_COMPARE_HEIGHT = 1280
+COMPARE_GAP = 16
+# Cambiarlo invalida todas las comparaciones guardadas si cambia el algoritmo
+COMPARE_VERSION = 1
+
+
+def _content_key(photo):
+    # Las fotos sin blob son anteriores al almacenamiento por contenido; su nombre es único
+    return photo.blob.sha256 if photo.blob_id else photo.photo.name
+
+
+def comparison_name(first, second, mode, height):
+    """Ruta de la comparación en caché, derivada del contenido de ambas fotos y los parámetros.
+
+    Vive fuera de ``progress_photos`` para que ``gc_media`` no la trate como
+    huérfana; ``gc_media --prefix comparisons`` sirve para vaciar las antiguas.
+    """
+    _, extension = rendition_format()
+    key = hashlib.sha256(
+        f'{COMPARE_VERSION}:{_content_key(first)}:{_content_key(second)}:{mode}:{height}'.encode()
+    ).hexdigest()
+    return f'comparisons/{key[:2]}/{key}.{extension}'
+
+
+def _source_name(photo, height):
+    """La versión más pequeña que alcanza la altura pedida; si ninguna alcanza, el original"""
+    renditions = sorted(photo.renditions.values(), key=lambda rendition: rendition['height'])
+    for rendition in renditions:
+        if rendition['height'] >= height:
+            return rendition['name']
+    return photo.photo.name
+
+
+def _open_scaled(storage, name, height):
+    with storage.open(name, 'rb') as file, Image.open(file) as source:
+        image = prepare_image(source).convert('RGB')
+    width = max(1, round(image.width * height / image.height))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def compose(first, second, mode):
+    """Une dos imágenes de igual altura: lado a lado, superpuestas al 50 % o su diferencia"""
+    if mode == 'side':
+        canvas = Image.new('RGB', (first.width + COMPARE_GAP + second.width, first.height), 'white')
+        canvas.paste(first, (0, 0))
+        canvas.paste(second, (first.width + COMPARE_GAP, 0))
+        return canvas
+
+    # Para superponer, la segunda se recorta centrada al encuadre de la primera
+    second = ImageOps.fit(second, first.size, Image.Resampling.LANCZOS)
+    if mode == 'overlay':
+        return Image.blend(first, second, 0.5)
+    return ImageChops.difference(first, second)
+
+
+def render_comparison(first, second, mode='side', height=COMPARE_HEIGHT):
+    """Nombre en el storage de la comparación; solo la genera si aún no está en disco"""
+    storage = ProgressPhoto._meta.get_field('photo').storage
+    name = comparison_name(first, second, mode, height)
+    if storage.exists(name):
+        return name
+
+    image = compose(
+        _open_scaled(storage, _source_name(first, height), height),
+        _open_scaled(storage, _source_name(second, height), height),
+        mode
+    )
+    image_format, _ = rendition_format()
+    saved = storage.save(name, ContentFile(encode_image(image, image_format)))
+    if saved != name:
+        # Otra petición la generó al mismo tiempo: se descarta la copia renombrada
+        storage.delete(saved)
+    return name
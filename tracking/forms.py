@@ -99,4 +99,72 @@ class ProgressPhotoForm(forms.ModelForm):
         help_texts = {
             'photo_type': 'Selecciona el ángulo de la foto',
             'photo': 'Selecciona una imagen clara y bien iluminada'
-        }
\ No newline at end of file
+        }
+
+class WeightSyncForm(forms.ModelForm):
+    """Valida un día de peso recibido por la API o una importación"""
+    class Meta:
+        model = WeightRecord
+        fields = ['date', 'weight', 'notes']
+
+class BodyMeasurementSyncForm(forms.ModelForm):
+    """Valida un día de medidas recibido por la API o una importación"""
+    class Meta:
+        model = BodyMeasurement
+        fields = ['date', 'chest', 'waist', 'hips', 'arms', 'thighs', 'notes']
+
+class TrackingImportForm(forms.Form):
+    KIND_CHOICES = [
+        ('weight', 'Peso'),
+        ('measurements', 'Medidas corporales'),
+    ]
+
+    kind = forms.ChoiceField(
+        choices=KIND_CHOICES,
+        label='Tipo de historial',
+        widget=forms.Select(attrs={
+            'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-primary focus:border-transparent'
+        })
+    )
+    file = forms.FileField(
+        label='Archivo',
+        help_text='CSV con encabezado o JSON; cada registro debe incluir la fecha (AAAA-MM-DD)',
+        widget=forms.FileInput(attrs={
+            'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-primary focus:border-transparent file:mr-4 file:py-2 file:px-4 file:rounded-full file:border-0 file:text-sm file:font-semibold file:bg-primary-light file:text-primary-dark hover:file:bg-primary',
+            'accept': '.csv,.json'
+        })
+    )
+
+class ProgressPhotoSessionForm(forms.Form):
+    """Una sesión de fotos: un archivo opcional por ángulo y notas comunes"""
+    FILE_WIDGET_ATTRS = {
+        'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-primary focus:border-transparent file:mr-4 file:py-2 file:px-4 file:rounded-full file:border-0 file:text-sm file:font-semibold file:bg-primary-light file:text-primary-dark hover:file:bg-primary',
+        'accept': 'image/*'
+    }
+
+    front = forms.FileField(required=False, label='Frente', widget=forms.FileInput(attrs=FILE_WIDGET_ATTRS))
+    side = forms.FileField(required=False, label='Lateral', widget=forms.FileInput(attrs=FILE_WIDGET_ATTRS))
+    back = forms.FileField(required=False, label='Espalda', widget=forms.FileInput(attrs=FILE_WIDGET_ATTRS))
+    notes = forms.CharField(
+        required=False,
+        label='Notas',
+        widget=forms.Textarea(attrs={
+            'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-primary focus:border-transparent',
+            'rows': 2,
+            'placeholder': 'Observaciones de la sesión (opcional)'
+        })
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.get_uploads():
+            raise forms.ValidationError('Selecciona al menos una foto')
+        return cleaned_data
+
+    def get_uploads(self):
+        """Pares ``(tipo, archivo)`` en el orden de ``PHOTO_TYPE_CHOICES``"""
+        return [
+            (photo_type, self.cleaned_data[photo_type])
+            for photo_type, _ in ProgressPhoto.PHOTO_TYPE_CHOICES
+            if self.cleaned_data.get(photo_type)
+        ]
@@ -0,0 +1,139 @@
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Lead
+
+from .models import BodyMeasurement, ProgressPhoto, WeightRecord
+
+HISTORY_PAGE_SIZE = 50
+GALLERY_PAGE_SIZE = 24
+MEASUREMENT_FIELDS = ['chest', 'waist', 'hips', 'arms', 'thighs']
+
+WeightRow = namedtuple('WeightRow', 'id date weight notes change change_symbol')
+MeasurementCell = namedtuple('MeasurementCell', 'value change change_symbol')
+MeasurementRow = namedtuple('MeasurementRow', ['id', 'date', 'notes'] + MEASUREMENT_FIELDS)
+
+
+def change_symbol(change):
+    """Símbolo de dirección para un cambio entre dos registros"""
+    return '↑' if change > 0 else '↓' if change < 0 else '='
+
+
+def encode_cursor(date, pk):
+    return f'{date.isoformat()}_{pk}'
+
+
+def decode_cursor(cursor):
+    """Convierte ``AAAA-MM-DD_id`` en ``(date, id)``; ``None`` si no es válido"""
+    try:
+        date, pk = cursor.split('_')
+        return datetime.strptime(date, '%Y-%m-%d').date(), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def after_cursor(queryset, cursor):
+    """Registros más antiguos que el cursor en el orden ``(-date, -id)``"""
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        date, pk = position
+        queryset = queryset.filter(Q(date__lt=date) | Q(date=date, id__lt=pk))
+    return queryset
+
+
+def _page(queryset, cursor, fields, page_size, changes=None):
+    """Página de historial del más reciente al más antiguo, paginada por ``(date, id)``.
+
+    Por defecto el cambio de cada campo se calcula en SQL con ``LEAD`` sobre el
+    mismo orden descendente de la página: el registro siguiente en ese orden es
+    el anterior en el tiempo. Como el cursor solo descarta registros más
+    recientes, el anterior de cada fila siempre queda dentro de la ventana, y la
+    base de datos puede detenerse al llegar al límite.
+    """
+    queryset = after_cursor(queryset, cursor)
+    if changes is None:
+        ordering = [F('date').desc(), F('id').desc()]
+        changes = {
+            f'{field}_change': F(field) - Window(Lead(field), order_by=ordering)
+            for field in fields
+        }
+    rows = list(
+        queryset.annotate(**changes).order_by('-date', '-id').values_list(
+            'id', 'date', 'notes', *fields, *changes
+        )[:page_size + 1]
+    )
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return rows, next_cursor
+
+
+def weight_history_page(user, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    rows, next_cursor = _page(
+        WeightRecord.objects.filter(user=user), cursor, ['weight'], page_size
+    )
+    return [
+        WeightRow(
+            pk, date, weight, notes,
+            0 if change is None else abs(change),
+            None if change is None else change_symbol(change),
+        )
+        for pk, date, notes, weight, change in rows
+    ], next_cursor
+
+
+def _previous_present(model, field):
+    """Último valor no vacío de ``field`` anterior a la fila, como subconsulta correlacionada"""
+    return Subquery(
+        model.objects.filter(user=OuterRef('user'), **{f'{field}__isnull': False})
+        .filter(Q(date__lt=OuterRef('date')) | Q(date=OuterRef('date'), id__lt=OuterRef('id')))
+        .order_by('-date', '-id').values(field)[:1]
+    )
+
+
+def measurement_history_page(user, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    """Página de medidas con el cambio de cada una respecto al último día que la tuvo.
+
+    Una medida puede faltar en algunos días, así que en lugar de ``LEAD`` cada
+    cambio usa una subconsulta por campo; solo se evalúa para las filas de la
+    página.
+    """
+    changes = {
+        f'{field}_change': F(field) - _previous_present(BodyMeasurement, field)
+        for field in MEASUREMENT_FIELDS
+    }
+    rows, next_cursor = _page(
+        BodyMeasurement.objects.filter(user=user), cursor, MEASUREMENT_FIELDS, page_size, changes
+    )
+    size = len(MEASUREMENT_FIELDS)
+    page = []
+    for row in rows:
+        values = row[3:3 + size]
+        changes = row[3 + size:]
+        cells = [
+            MeasurementCell(
+                value,
+                None if change is None else abs(change),
+                None if change is None else change_symbol(change),
+            )
+            for value, change in zip(values, changes)
+        ]
+        page.append(MeasurementRow(row[0], row[1], row[2], *cells))
+    return page, next_cursor
+
+
+def photo_gallery_page(user, photo_type, cursor=None, page_size=GALLERY_PAGE_SIZE):
+    """Fotos de un ángulo de la más reciente a la más antigua, paginadas por ``(date, id)``"""
+    queryset = after_cursor(
+        ProgressPhoto.objects.filter(user=user, photo_type=photo_type), cursor
+    )
+    photos = list(queryset.order_by('-date', '-id')[:page_size + 1])
+
+    next_cursor = None
+    if len(photos) > page_size:
+        photos = photos[:page_size]
+        next_cursor = encode_cursor(photos[-1].date, photos[-1].pk)
+    return photos, next_cursor
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+from .forms import BodyMeasurementSyncForm, WeightSyncForm
+from .models import BodyMeasurement, WeightRecord
+
+# Tipo de historial -> (modelo, formulario que valida cada día)
+IMPORT_KINDS = {
+    'weight': (WeightRecord, WeightSyncForm),
+    'measurements': (BodyMeasurement, BodyMeasurementSyncForm),
+}
+IMPORT_FORMATS = ('csv', 'json')
+
+
+class ImportFormatError(ValueError):
+    """El archivo no se puede leer como CSV o JSON de registros"""
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in IMPORT_FORMATS:
+        raise ImportFormatError('Formato no soportado; usa un archivo .csv o .json')
+    return extension
+
+
+def read_records(content, file_format):
+    """Convierte el contenido de un archivo en una lista de dicts, uno por día.
+
+    CSV: una fila de encabezado con ``date`` y los campos del registro.
+    JSON: una lista de objetos o ``{"records": [...]}``.
+    """
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ImportFormatError('El archivo debe estar codificado en UTF-8')
+
+    if file_format == 'csv':
+        reader = csv.DictReader(io.StringIO(content))
+        if not reader.fieldnames or 'date' not in reader.fieldnames:
+            raise ImportFormatError('El CSV debe tener una columna "date"')
+        # Las celdas vacías se tratan como valores ausentes
+        return [
+            {key: value for key, value in row.items() if key and value not in ('', None)}
+            for row in reader
+        ]
+
+    try:
+        data = json.loads(content)
+    except ValueError:
+        raise ImportFormatError('El JSON no es válido')
+    if isinstance(data, dict):
+        data = data.get('records')
+    if not isinstance(data, list):
+        raise ImportFormatError('El JSON debe ser una lista de registros')
+    return data
+
+
+def validate_records(records, form_class):
+    """Valida todos los días en memoria.
+
+    Devuelve ``(entries, errors)``: ``entries`` es ``{fecha: valores}`` (si una
+    fecha se repite gana la última) y ``errors`` una lista de
+    ``{'index': n, 'errors': {...}}``.
+    """
+    entries = {}
+    errors = []
+    for index, record in enumerate(records):
+        form = form_class(record if isinstance(record, dict) else {})
+        if form.is_valid():
+            values = dict(form.cleaned_data)
+            entries[values.pop('date')] = values
+        else:
+            errors.append({'index': index, 'errors': form.errors})
+    return entries, errors
@@ -0,0 +1,135 @@
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from finances.management.commands.benchmark_finances import percentile
+from tracking.columns import MeasurementColumns
+from tracking.history import MEASUREMENT_FIELDS, measurement_history_page
+from tracking.models import BodyMeasurement
+from tracking.views import INITIAL_CHART_POINTS
+
+
+def summarize(timings):
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Mide la vista de medidas corporales con un historial sintético y guarda el resultado en JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=10000,
+                            help='Días de medidas del historial sintético')
+        parser.add_argument('--iterations', type=int, default=20,
+                            help='Repeticiones medidas por escenario')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Semilla para reproducir los valores generados')
+        parser.add_argument('--output', default='measurements_benchmark.json',
+                            help='Archivo JSON de salida')
+        parser.add_argument('--label', default='',
+                            help='Etiqueta libre para identificar la corrida')
+
+    def handle(self, *args, **options):
+        if options['records'] < 1 or options['iterations'] < 1:
+            raise CommandError('--records e --iterations deben ser mayores que 0')
+
+        # El historial se crea dentro de una transacción que se revierte al terminar
+        with transaction.atomic():
+            user = self._seed(options['records'], random.Random(options['seed']))
+            results = {
+                'chart': self._measure_chart(user, options['iterations']),
+                'page': self._measure_page(user, options['iterations']),
+                'view': self._measure_view(user, options['iterations']),
+            }
+            transaction.set_rollback(True)
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<8} p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms "
+                f"queries={result['queries']}"
+            )
+
+        report = {
+            'label': options['label'],
+            'generated_at': timezone.now().isoformat(),
+            'iterations': options['iterations'],
+            'dataset': {'measurements': options['records']},
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def _seed(self, records, rng):
+        user = get_user_model().objects.create_user(
+            email=f'benchmark-{time.time_ns()}@example.com', password=None
+        )
+        start = timezone.localdate() - timedelta(days=records - 1)
+        measurements = []
+        for day in range(records):
+            values = {
+                # Cerca de un 20 % de vacíos para ejercitar los cambios que saltan nulos
+                field: None if rng.random() < 0.2 else round(rng.uniform(30, 120), 1)
+                for field in MEASUREMENT_FIELDS
+            }
+            measurements.append(BodyMeasurement(user=user, date=start + timedelta(days=day), **values))
+        BodyMeasurement.objects.bulk_create(measurements, batch_size=1000)
+        return user
+
+    def _measure_chart(self, user, iterations):
+        """Gráfica de la vista: consulta de todas las medidas, transposición y reducción"""
+        return self._measure(
+            iterations, lambda: MeasurementColumns.for_user(user).chart_data(INITIAL_CHART_POINTS)
+        )
+
+    def _measure_page(self, user, iterations):
+        """Primera página de la tabla con los cambios calculados en SQL"""
+        return self._measure(iterations, lambda: measurement_history_page(user))
+
+    def _measure(self, iterations, run):
+        timings = []
+        queries = 0
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = len(context.captured_queries)
+        return {'queries': queries, **summarize(timings)}
+
+    def _measure_view(self, user, iterations):
+        client = Client()
+        client.force_login(user)
+        url = reverse('tracking:measurements')
+
+        timings = []
+        queries = 0
+        status_code = None
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            # Petición de calentamiento para no medir la carga inicial de plantillas
+            client.get(url)
+            for _ in range(iterations):
+                reset_queries()
+                with CaptureQueriesContext(connection) as context:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries = len(context.captured_queries)
+                status_code = response.status_code
+        return {'url': url, 'status_code': status_code, 'queries': queries, **summarize(timings)}
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracking.cleanup import collect_orphans
+from tracking.models import ProgressPhoto
+
+
+class Command(BaseCommand):
+    help = 'Elimina del storage los archivos de fotos que ya no referencia ningún registro'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='progress_photos',
+                            help='Directorio del storage a revisar; con "comparisons" vacía la caché de comparaciones')
+        parser.add_argument('--min-age', type=int, default=60,
+                            help='Minutos de antigüedad mínima para borrar un archivo huérfano')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo lista los archivos huérfanos, sin borrarlos')
+
+    def handle(self, *args, **options):
+        if options['min_age'] < 0:
+            raise CommandError('--min-age no puede ser negativo')
+
+        storage = ProgressPhoto._meta.get_field('photo').storage
+        orphans = collect_orphans(
+            storage,
+            prefix=options['prefix'].strip('/'),
+            min_age=timedelta(minutes=options['min_age']),
+            dry_run=options['dry_run']
+        )
+
+        count = 0
+        try:
+            for name in orphans:
+                count += 1
+                self.stdout.write(name)
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        action = 'encontrados' if options['dry_run'] else 'eliminados'
+        self.stdout.write(self.style.SUCCESS(f'{count} archivos huérfanos {action}'))
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracking.importers import (
+    IMPORT_FORMATS, IMPORT_KINDS, ImportFormatError, detect_format, read_records, validate_records
+)
+from tracking.upserts import bulk_upsert_daily
+
+
+class Command(BaseCommand):
+    help = 'Importa un historial de peso o medidas desde un archivo CSV o JSON con fechas explícitas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo CSV o JSON a importar')
+        parser.add_argument('--user', required=True,
+                            help='Email del usuario dueño de los registros')
+        parser.add_argument('--kind', choices=sorted(IMPORT_KINDS), default='weight',
+                            help='Tipo de historial a importar')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, default=None,
+                            help='Formato del archivo (por defecto según la extensión)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Tamaño de lote para bulk_create')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo valida el archivo, sin escribir')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor que 0')
+
+        user = get_user_model().objects.filter(email=options['user']).first()
+        if user is None:
+            raise CommandError(f"No existe un usuario con email {options['user']}")
+
+        model, form_class = IMPORT_KINDS[options['kind']]
+        try:
+            file_format = options['format'] or detect_format(options['path'])
+            with open(options['path'], 'rb') as source:
+                records = read_records(source.read(), file_format)
+        except OSError as error:
+            raise CommandError(f'No se pudo leer el archivo: {error}')
+        except ImportFormatError as error:
+            raise CommandError(str(error))
+
+        entries, errors = validate_records(records, form_class)
+        if errors:
+            for error in errors:
+                for field, field_errors in error['errors'].items():
+                    self.stderr.write(f"Registro {error['index'] + 1}: {field}: {' '.join(field_errors)}")
+            raise CommandError(f'{len(errors)} registros inválidos; no se importó nada')
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(entries)} días válidos (sin escribir)')
+            return
+
+        count = bulk_upsert_daily(model, user, entries, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{count} días importados para {user.email}'))
@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from tracking.models import ProgressPhoto
+from tracking.photo_queue import (
+    MAX_ATTEMPTS, claim_photos, complete_photo, fail_photo, process_photo, requeue_stale,
+    shared_renditions
+)
+from tracking.renditions import render_photo
+
+
+def _init_process():
+    # Con el método "spawn" el proceso hijo arranca sin Django configurado
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Genera en segundo plano las versiones reducidas de las fotos de progreso pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Procesos del pool (por defecto uno por CPU; 0 procesa en este proceso)')
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help='Fotos que se toman de la cola en cada vuelta')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Segundos de espera cuando la cola está vacía')
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS,
+                            help='Intentos antes de marcar una foto como fallida')
+        parser.add_argument('--once', action='store_true',
+                            help='Termina cuando no quedan fotos pendientes disponibles')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor que 0')
+        if options['processes'] is not None and options['processes'] < 0:
+            raise CommandError('--processes no puede ser negativo')
+
+        self.storage = ProgressPhoto._meta.get_field('photo').storage
+        self.max_attempts = options['max_attempts']
+
+        if options['processes'] == 0:
+            self._run(self._process_inline, options)
+            return
+
+        with ProcessPoolExecutor(max_workers=options['processes'], initializer=_init_process) as pool:
+            self._run(lambda batch: self._process_pool(pool, batch), options)
+
+    def _run(self, process_batch, options):
+        processed = 0
+        try:
+            while True:
+                close_old_connections()
+                requeue_stale()
+                batch = claim_photos(options['batch_size'])
+                if batch:
+                    processed += process_batch(batch)
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'{processed} fotos procesadas'))
+
+    def _process_inline(self, batch):
+        for photo_id, name in batch:
+            self._report(photo_id, process_photo(photo_id, name, self.storage, self.max_attempts))
+        return len(batch)
+
+    def _process_pool(self, pool, batch):
+        # El trabajo de Pillow (CPU) va al pool; las escrituras en la base quedan en este proceso
+        futures = {}
+        for photo_id, name in batch:
+            renditions = shared_renditions(photo_id, name)
+            if renditions:
+                complete_photo(photo_id, renditions, self.storage, owned=False)
+                self._report(photo_id, ProgressPhoto.STATUS_READY)
+            else:
+                futures[photo_id] = pool.submit(render_photo, name)
+
+        for photo_id, future in futures.items():
+            try:
+                renditions = future.result()
+            except Exception as error:
+                status = fail_photo(photo_id, error, self.max_attempts)
+            else:
+                complete_photo(photo_id, renditions, self.storage)
+                status = ProgressPhoto.STATUS_READY
+            self._report(photo_id, status)
+        return len(batch)
+
+    def _report(self, photo_id, status):
+        if status == ProgressPhoto.STATUS_READY:
+            self.stdout.write(f'Foto {photo_id}: lista')
+        elif status is not None:
+            self.stderr.write(f'Foto {photo_id}: error ({status})')
@@ -0,0 +1,126 @@
+import mimetypes
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+# Archivos por contenido, sus versiones y las comparaciones: el nombre cambia si cambia el contenido
+HASHED_NAME = re.compile(
+    r'^(?:progress_photos/[0-9a-f]{2}/[0-9a-f]{2}|comparisons/[0-9a-f]{2})/'
+    r'(?P<key>[0-9a-f]{64}(?:_[a-z]+)?)\.[a-z0-9]+$'
+)
+RANGE_HEADER = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 24 * 60 * 60
+
+
+class RangeFile:
+    """Vista de solo lectura sobre ``length`` bytes de un archivo a partir de ``start``"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """``(inicio, fin)`` inclusivo de un único rango ``bytes=``.
+
+    Devuelve ``None`` si no hay rango utilizable (se responde el archivo
+    completo) y ``False`` si el rango no se puede satisfacer.
+    """
+    match = RANGE_HEADER.match(header.strip()) if header else None
+    if not match or (not match['start'] and not match['end']):
+        return None
+    if not match['start']:
+        length = int(match['end'])
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(match['start'])
+    end = int(match['end']) if match['end'] else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def file_validators(storage, name):
+    """ETag, fecha de modificación e inmutabilidad de un archivo del storage"""
+    modified = storage.get_modified_time(name)
+    match = HASHED_NAME.match(name)
+    if match:
+        return quote_etag(match['key']), modified, True
+    return quote_etag(f'{int(modified.timestamp()):x}-{storage.size(name):x}'), modified, False
+
+
+def serve_file(request, storage, name):
+    """Respuesta para un archivo ya autorizado, con ETag, caché y rangos.
+
+    Con ``MEDIA_SERVE_BACKEND`` el servidor web entrega el archivo (y resuelve
+    los rangos); si no, ``FileResponse`` lo transmite por bloques y el servidor
+    WSGI puede usar ``sendfile`` mediante ``wsgi.file_wrapper``.
+    """
+    etag, modified, immutable = file_validators(storage, name)
+    last_modified = modified.timestamp()
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, storage, name, etag)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if immutable:
+        patch_cache_control(response, private=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, max_age=MUTABLE_MAX_AGE)
+    return response
+
+
+def _file_response(request, storage, name, etag):
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    backend = getattr(settings, 'MEDIA_SERVE_BACKEND', None)
+
+    if backend == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + name
+        return response
+    if backend == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = storage.path(name)
+        return response
+
+    size = storage.size(name)
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range == etag:
+        byte_range = parse_range(request.headers.get('Range'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = storage.open(name, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), content_type=content_type, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
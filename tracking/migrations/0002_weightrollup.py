@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_weight_rollups(apps, schema_editor):
+    WeightRecord = apps.get_model('tracking', 'WeightRecord')
+    WeightRollup = apps.get_model('tracking', 'WeightRollup')
+
+    buckets = {}
+    for user_id, date, weight in WeightRecord.objects.values_list('user_id', 'date', 'weight').iterator():
+        iso_year, iso_week, _ = date.isocalendar()
+        for key in ((user_id, 'week', iso_year, iso_week), (user_id, 'month', date.year, date.month)):
+            bucket = buckets.setdefault(key, [0, 0.0, weight, weight])
+            bucket[0] += 1
+            bucket[1] += weight
+            bucket[2] = min(bucket[2], weight)
+            bucket[3] = max(bucket[3], weight)
+
+    WeightRollup.objects.bulk_create([
+        WeightRollup(
+            user_id=user_id, period=period, year=year, number=number,
+            count=count, total=total, min_weight=minimum, max_weight=maximum
+        )
+        for (user_id, period, year, number), (count, total, minimum, maximum) in buckets.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeightRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Semana'), ('month', 'Mes')], max_length=10)),
+                ('year', models.PositiveIntegerField()),
+                ('number', models.PositiveSmallIntegerField(help_text='Semana ISO o mes')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('min_weight', models.FloatField()),
+                ('max_weight', models.FloatField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Acumulado de Peso',
+                'verbose_name_plural': 'Acumulados de Peso',
+                'ordering': ['period', 'year', 'number'],
+                'unique_together': {('user', 'period', 'year', 'number')},
+            },
+        ),
+        migrations.RunPython(backfill_weight_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0002_weightrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bodymeasurement',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate, verbose_name='Fecha'),
+        ),
+        migrations.AlterField(
+            model_name='weightrecord',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate, verbose_name='Fecha'),
+        ),
+    ]
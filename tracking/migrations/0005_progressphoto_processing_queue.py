@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:11
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_processed_photos(apps, schema_editor):
+    # Las fotos que ya tienen versiones quedan listas; el resto lo completa run_photo_worker
+    ProgressPhoto = apps.get_model('tracking', 'ProgressPhoto')
+    ProgressPhoto.objects.exclude(renditions={}).update(status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0004_progressphoto_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progressphoto',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='progressphoto',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='progressphoto',
+            name='last_error',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='progressphoto',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('ready', 'Lista'), ('failed', 'Fallida')], default='pending', editable=False, max_length=20, verbose_name='Estado'),
+        ),
+        migrations.AddIndex(
+            model_name='progressphoto',
+            index=models.Index(fields=['status', 'available_at'], name='tracking_photo_queue_idx'),
+        ),
+        migrations.RunPython(mark_processed_photos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:30
+
+from django.db import migrations, models
+
+
+def backfill_weight_trends(apps, schema_editor):
+    # Misma media móvil que tracking.trends.smooth: 10 % de la distancia por día
+    WeightRecord = apps.get_model('tracking', 'WeightRecord')
+
+    records = []
+    previous = None
+    for record in WeightRecord.objects.order_by('user_id', 'date').only('id', 'user_id', 'date', 'weight').iterator():
+        if previous is None or previous.user_id != record.user_id:
+            record.trend = record.weight
+        else:
+            factor = 1 - 0.9 ** max((record.date - previous.date).days, 1)
+            record.trend = previous.trend + factor * (record.weight - previous.trend)
+        records.append(record)
+        previous = record
+    WeightRecord.objects.bulk_update(records, ['trend'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0006_photoblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weightrecord',
+            name='trend',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Tendencia'),
+        ),
+        migrations.RunPython(backfill_weight_trends, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0007_weightrecord_trend'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackingSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tracking_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('weight_count', models.PositiveIntegerField(default=0)),
+                ('first_weight', models.FloatField(blank=True, null=True)),
+                ('first_weight_date', models.DateField(blank=True, null=True)),
+                ('latest_weight', models.FloatField(blank=True, null=True)),
+                ('latest_weight_date', models.DateField(blank=True, null=True)),
+                ('min_weight', models.FloatField(blank=True, null=True)),
+                ('max_weight', models.FloatField(blank=True, null=True)),
+                ('recent_weights', models.JSONField(blank=True, default=dict)),
+                ('measurement_count', models.PositiveIntegerField(default=0)),
+                ('latest_measurement_date', models.DateField(blank=True, null=True)),
+                ('latest_measurement', models.JSONField(blank=True, default=dict)),
+                ('recent_measurements', models.JSONField(blank=True, default=list)),
+                ('photo_count', models.PositiveIntegerField(default=0)),
+                ('latest_photo_date', models.DateField(blank=True, null=True)),
+                ('recent_photos', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Seguimiento',
+                'verbose_name_plural': 'Resúmenes de Seguimiento',
+            },
+        ),
+    ]
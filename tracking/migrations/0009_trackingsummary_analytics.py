@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0008_trackingsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trackingsummary',
+            name='analytics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
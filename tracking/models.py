@@ -1,13 +1,20 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-import os
+from django.urls import reverse
+from django.utils import timezone
 import uuid
+from datetime import timedelta
+
+# Días hacia atrás que cubren los datos recientes de TrackingSummary
+SUMMARY_WINDOW_DAYS = 30
 
 class WeightRecord(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    date = models.DateField(auto_now_add=True, verbose_name="Fecha")
+    date = models.DateField(default=timezone.localdate, verbose_name="Fecha")
     weight = models.FloatField(verbose_name="Peso", help_text="Peso en kilogramos")
     notes = models.TextField(blank=True, null=True, verbose_name="Notas")
+    # Media móvil exponencial del peso hasta esta fecha; la mantiene tracking.trends
+    trend = models.FloatField(null=True, blank=True, editable=False, verbose_name="Tendencia")
 
     class Meta:
         ordering = ['-date', '-id']
@@ -18,9 +25,40 @@ class WeightRecord(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.date}: {self.weight}kg"
 
+class WeightRollup(models.Model):
+    """Acumulado semanal (año ISO) o mensual de los registros de peso de un usuario"""
+    PERIOD_WEEK = 'week'
+    PERIOD_MONTH = 'month'
+    PERIOD_CHOICES = [
+        (PERIOD_WEEK, 'Semana'),
+        (PERIOD_MONTH, 'Mes')
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    year = models.PositiveIntegerField()
+    number = models.PositiveSmallIntegerField(help_text="Semana ISO o mes")
+    count = models.PositiveIntegerField(default=0)
+    total = models.FloatField(default=0)
+    min_weight = models.FloatField()
+    max_weight = models.FloatField()
+
+    class Meta:
+        ordering = ['period', 'year', 'number']
+        verbose_name = "Acumulado de Peso"
+        verbose_name_plural = "Acumulados de Peso"
+        unique_together = ['user', 'period', 'year', 'number']
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else None
+
+    def __str__(self):
+        return f"{self.user.email} - {self.get_period_display()} {self.number}/{self.year}"
+
 class BodyMeasurement(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    date = models.DateField(auto_now_add=True, verbose_name="Fecha")
+    date = models.DateField(default=timezone.localdate, verbose_name="Fecha")
     chest = models.FloatField(null=True, blank=True, verbose_name="Pecho", help_text="Medida en centímetros")
     waist = models.FloatField(null=True, blank=True, verbose_name="Cintura", help_text="Medida en centímetros")
     hips = models.FloatField(null=True, blank=True, verbose_name="Cadera", help_text="Medida en centímetros")
@@ -43,34 +81,208 @@ def progress_photo_path(instance, filename):
     filename = f'{uuid.uuid4()}.{ext}'
     return f'progress_photos/{instance.user.id}/{instance.photo_type}/{filename}'
 
+def blob_path(sha256, extension):
+    """Ruta por contenido repartida en dos niveles: ``progress_photos/ab/cd/abcd....jpg``"""
+    return f'progress_photos/{sha256[:2]}/{sha256[2:4]}/{sha256}.{extension}'
+
+class PhotoBlob(models.Model):
+    """Archivo de foto identificado por el SHA-256 de su contenido; lo comparten las fotos idénticas"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, help_text="Ruta en el storage")
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archivo de Foto"
+        verbose_name_plural = "Archivos de Foto"
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count})"
+
+    @classmethod
+    def release(cls, blob_id):
+        """Resta una referencia; con la última borra la fila y la devuelve para eliminar sus archivos"""
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(pk=blob_id).first()
+            if blob is None:
+                return None
+            if blob.ref_count > 1:
+                cls.objects.filter(pk=blob_id).update(ref_count=models.F('ref_count') - 1)
+                return None
+            blob.delete()
+        return blob
+
 class ProgressPhoto(models.Model):
     PHOTO_TYPE_CHOICES = [
         ('front', 'Frente'),
         ('side', 'Lateral'),
         ('back', 'Espalda')
     ]
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_PROCESSING, 'Procesando'),
+        (STATUS_READY, 'Lista'),
+        (STATUS_FAILED, 'Fallida')
+    ]
     
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     date = models.DateField(auto_now_add=True, verbose_name="Fecha")
     photo = models.ImageField(upload_to=progress_photo_path, verbose_name="Foto")
+    blob = models.ForeignKey(
+        PhotoBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='photos'
+    )
     photo_type = models.CharField(
         max_length=20,
         choices=PHOTO_TYPE_CHOICES,
         verbose_name="Tipo de Foto"
     )
     notes = models.TextField(blank=True, null=True, verbose_name="Notas")
+    # Versiones reducidas: {'thumb': {'name': ..., 'width': ..., 'height': ...}, ...}
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # Cola de procesamiento: run_photo_worker toma las pendientes cuyo available_at ya pasó
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        editable=False,
+        verbose_name="Estado"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    available_at = models.DateTimeField(default=timezone.now, editable=False)
+    last_error = models.TextField(blank=True, editable=False)
 
     class Meta:
         ordering = ['-date', '-id']
         verbose_name = "Foto de Progreso"
         verbose_name_plural = "Fotos de Progreso"
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='tracking_photo_queue_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.date} - {self.get_photo_type_display()}"
 
-    def delete(self, *args, **kwargs):
-        """Eliminar el archivo físico cuando se elimina el registro"""
-        if self.photo:
-            if os.path.isfile(self.photo.path):
-                os.remove(self.photo.path)
-        super().delete(*args, **kwargs)
\ No newline at end of file
+    @staticmethod
+    def media_url(name):
+        """URL de la vista que entrega el archivo tras comprobar que pertenece al usuario"""
+        return reverse('tracking:photo_media', args=[name])
+
+    @property
+    def url(self):
+        return self.media_url(self.photo.name)
+
+    def rendition_url(self, label):
+        """URL de una versión reducida, o la del original si aún no existe"""
+        rendition = self.renditions.get(label)
+        if rendition:
+            return self.media_url(rendition['name'])
+        return self.url
+
+    @property
+    def thumb_url(self):
+        return self.rendition_url('thumb')
+
+    @property
+    def medium_url(self):
+        return self.rendition_url('medium')
+
+    @property
+    def srcset(self):
+        """Valor para el atributo ``srcset`` con las versiones de menor a mayor ancho"""
+        renditions = sorted(self.renditions.values(), key=lambda rendition: rendition['width'])
+        return ', '.join(
+            f"{self.media_url(rendition['name'])} {rendition['width']}w"
+            for rendition in renditions
+        )
+
+    def rendition_names(self):
+        return [rendition['name'] for rendition in self.renditions.values()]
+
+
+class TrackingSummary(models.Model):
+    """Resumen de seguimiento de un usuario, leído por su clave primaria.
+
+    Lo actualizan las señales al guardar o borrar pesos, medidas y fotos (ver
+    ``tracking.summary``). Los datos recientes se guardan por fecha para que
+    la ventana de los últimos días siga siendo exacta aunque pasen días sin
+    escrituras.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='tracking_summary'
+    )
+    weight_count = models.PositiveIntegerField(default=0)
+    first_weight = models.FloatField(null=True, blank=True)
+    first_weight_date = models.DateField(null=True, blank=True)
+    latest_weight = models.FloatField(null=True, blank=True)
+    latest_weight_date = models.DateField(null=True, blank=True)
+    min_weight = models.FloatField(null=True, blank=True)
+    max_weight = models.FloatField(null=True, blank=True)
+    # {'AAAA-MM-DD': peso} de la ventana reciente
+    recent_weights = models.JSONField(default=dict, blank=True)
+    measurement_count = models.PositiveIntegerField(default=0)
+    latest_measurement_date = models.DateField(null=True, blank=True)
+    # {'chest': ..., 'waist': ...} del último registro de medidas
+    latest_measurement = models.JSONField(default=dict, blank=True)
+    # Fechas con medidas dentro de la ventana reciente
+    recent_measurements = models.JSONField(default=list, blank=True)
+    photo_count = models.PositiveIntegerField(default=0)
+    latest_photo_date = models.DateField(null=True, blank=True)
+    # {'AAAA-MM-DD': cantidad de fotos} de la ventana reciente
+    recent_photos = models.JSONField(default=dict, blank=True)
+    # Resultados de tracking.analytics por ventana; se vacía al cambiar pesos o medidas
+    analytics = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen de Seguimiento"
+        verbose_name_plural = "Resúmenes de Seguimiento"
+
+    def __str__(self):
+        return f"{self.user.email} - resumen"
+
+    @staticmethod
+    def window_start(today, days=SUMMARY_WINDOW_DAYS):
+        return (today - timedelta(days=days)).isoformat()
+
+    def weight_stats(self, today):
+        """Inicio, actual, extremos y cambios del último mes para la plantilla de seguimiento"""
+        if not self.weight_count:
+            return {}
+
+        since = self.window_start(today)
+        window = [weight for day, weight in sorted(self.recent_weights.items()) if day >= since]
+        stats = {
+            'inicio': {'peso': self.first_weight, 'fecha': self.first_weight_date},
+            'actual': {'peso': self.latest_weight, 'fecha': self.latest_weight_date},
+            'cambio_total': self.latest_weight - self.first_weight,
+            'max': self.max_weight,
+            'min': self.min_weight,
+        }
+        if window:
+            stats['cambio_mes'] = self.latest_weight - window[0]
+            stats['promedio_mes'] = sum(window) / len(window)
+        else:
+            stats['cambio_mes'] = 0
+            stats['promedio_mes'] = self.latest_weight
+        return stats
+
+    def recent_records(self, today):
+        """Medidas y fotos registradas dentro de la ventana reciente"""
+        since = self.window_start(today)
+        return (
+            sum(1 for day in self.recent_measurements if day >= since)
+            + sum(count for day, count in self.recent_photos.items() if day >= since)
+        )
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ProgressPhoto
+from .renditions import render_photo
+
+MAX_ATTEMPTS = 5
+# Espera antes del reintento n: RETRY_DELAY * 2 ** (n - 1)
+RETRY_DELAY = timedelta(seconds=30)
+# Una foto en "processing" por más tiempo se considera abandonada por un worker caído
+STALE_AFTER = timedelta(minutes=10)
+
+
+def requeue_stale(now=None):
+    """Devuelve a la cola las fotos que quedaron tomadas por un worker que no terminó"""
+    now = now or timezone.now()
+    return ProgressPhoto.objects.filter(
+        status=ProgressPhoto.STATUS_PROCESSING,
+        available_at__lt=now - STALE_AFTER
+    ).update(status=ProgressPhoto.STATUS_PENDING, available_at=now)
+
+
+def claim_photos(limit, now=None):
+    """Toma hasta ``limit`` fotos pendientes y devuelve ``[(id, nombre), ...]``.
+
+    Cada foto se marca con un UPDATE condicionado a que siga pendiente, así que
+    si varios workers compiten por la misma solo uno la obtiene; no requiere
+    ``select_for_update(skip_locked=True)`` y funciona igual en SQLite.
+    """
+    now = now or timezone.now()
+    candidates = ProgressPhoto.objects.filter(
+        status=ProgressPhoto.STATUS_PENDING,
+        available_at__lte=now
+    ).order_by('available_at', 'id').values_list('id', 'photo')[:limit]
+
+    claimed = []
+    for photo_id, name in candidates:
+        taken = ProgressPhoto.objects.filter(
+            pk=photo_id, status=ProgressPhoto.STATUS_PENDING
+        ).update(
+            status=ProgressPhoto.STATUS_PROCESSING,
+            attempts=F('attempts') + 1,
+            available_at=now
+        )
+        if taken:
+            claimed.append((photo_id, name))
+    return claimed
+
+
+def complete_photo(photo_id, renditions, storage, owned=True):
+    """Guarda las versiones de la foto.
+
+    Si la foto se borró mientras tanto y las versiones se generaron para ella
+    (``owned``), se eliminan los archivos; las compartidas con otra foto no.
+    """
+    updated = ProgressPhoto.objects.filter(pk=photo_id).update(
+        status=ProgressPhoto.STATUS_READY,
+        renditions=renditions,
+        last_error=''
+    )
+    if not updated and owned:
+        for rendition in renditions.values():
+            storage.delete(rendition['name'])
+    return bool(updated)
+
+
+def fail_photo(photo_id, error, max_attempts=MAX_ATTEMPTS, now=None):
+    """Registra el error y reprograma la foto con espera exponencial, o la marca fallida"""
+    now = now or timezone.now()
+    attempts = ProgressPhoto.objects.filter(pk=photo_id).values_list('attempts', flat=True).first()
+    if attempts is None:
+        return None
+
+    if attempts >= max_attempts:
+        status = ProgressPhoto.STATUS_FAILED
+        available_at = now
+    else:
+        status = ProgressPhoto.STATUS_PENDING
+        available_at = now + RETRY_DELAY * 2 ** (attempts - 1)
+    ProgressPhoto.objects.filter(pk=photo_id).update(
+        status=status,
+        available_at=available_at,
+        last_error=str(error)[:1000]
+    )
+    return status
+
+
+def shared_renditions(photo_id, name):
+    """Versiones ya generadas por otra foto que comparte el mismo archivo"""
+    return ProgressPhoto.objects.filter(
+        photo=name, status=ProgressPhoto.STATUS_READY
+    ).exclude(pk=photo_id).exclude(renditions={}).values_list('renditions', flat=True).first()
+
+
+def process_photo(photo_id, name, storage, max_attempts=MAX_ATTEMPTS):
+    """Procesa una foto ya tomada en el proceso actual (sin pool)"""
+    renditions = shared_renditions(photo_id, name)
+    if renditions:
+        complete_photo(photo_id, renditions, storage, owned=False)
+        return ProgressPhoto.STATUS_READY
+
+    try:
+        renditions = render_photo(name)
+    except Exception as error:
+        return fail_photo(photo_id, error, max_attempts)
+    complete_photo(photo_id, renditions, storage)
+    return ProgressPhoto.STATUS_READY
@@ -0,0 +1,80 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+from .models import ProgressPhoto
+
+# Etiqueta -> lado mayor en píxeles de cada versión reducida
+RENDITION_SIZES = {
+    'thumb': 320,
+    'medium': 1280,
+}
+
+
+def rendition_format():
+    """WebP si Pillow lo soporta; si no, JPEG"""
+    if features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def rendition_name(photo_name, label, extension):
+    """Nombre de una versión junto al original: ``<ruta>/<archivo>_<etiqueta>.<ext>``"""
+    stem = photo_name.rsplit('.', 1)[0]
+    return f'{stem}_{label}.{extension}'
+
+
+def prepare_image(image):
+    """Aplica la orientación EXIF y descarta los metadatos de una imagen recién abierta"""
+    # En JPEG, draft decodifica directamente a una escala reducida cercana a la mayor versión
+    image.draft('RGB', (max(RENDITION_SIZES.values()),) * 2)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    image.info = {}
+    return image
+
+
+def encode_image(image, image_format):
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, image_format, quality=82, optimize=True, progressive=True)
+    else:
+        image.save(buffer, image_format, quality=80, method=4)
+    return buffer.getvalue()
+
+
+def encode_rendition(image, size, image_format):
+    rendition = image.copy()
+    rendition.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return encode_image(rendition, image_format), rendition.width, rendition.height
+
+
+def build_renditions(photo_name, file, storage):
+    """Genera y guarda todas las versiones de una foto; devuelve el dict para ``renditions``"""
+    image_format, extension = rendition_format()
+    with Image.open(file) as source:
+        image = prepare_image(source)
+        renditions = {}
+        for label, size in RENDITION_SIZES.items():
+            content, width, height = encode_rendition(image, size, image_format)
+            name = storage.save(
+                rendition_name(photo_name, label, extension), ContentFile(content)
+            )
+            renditions[label] = {'name': name, 'width': width, 'height': height}
+    return renditions
+
+
+def render_photo(name):
+    """Genera las versiones de la foto guardada en ``name``.
+
+    No toca la base de datos, así que puede ejecutarse en un proceso del pool de
+    ``run_photo_worker``; quien la llama registra el resultado en el modelo.
+    """
+    storage = ProgressPhoto._meta.get_field('photo').storage
+    with storage.open(name, 'rb') as file:
+        return build_renditions(name, file, storage)
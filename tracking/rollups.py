@@ -0,0 +1,119 @@
+from calendar import monthrange
+from datetime import date as date_cls, timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, Min, Value
+from django.db.models.functions import Greatest, Least
+
+from .models import WeightRecord, WeightRollup
+
+MONTH_LABELS = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+
+def rollup_keys(date):
+    """Claves (periodo, año, número) a las que aporta un registro de una fecha"""
+    iso_year, iso_week, _ = date.isocalendar()
+    return [
+        (WeightRollup.PERIOD_WEEK, iso_year, iso_week),
+        (WeightRollup.PERIOD_MONTH, date.year, date.month),
+    ]
+
+
+def rollup_date_range(period, year, number):
+    """Primer y último día cubiertos por un acumulado"""
+    if period == WeightRollup.PERIOD_WEEK:
+        start = date_cls.fromisocalendar(year, number, 1)
+        return start, start + timedelta(days=6)
+    return date_cls(year, number, 1), date_cls(year, number, monthrange(year, number)[1])
+
+
+def add_weight(user_id, date, weight):
+    with transaction.atomic():
+        for period, year, number in rollup_keys(date):
+            rollup, created = WeightRollup.objects.select_for_update().get_or_create(
+                user_id=user_id,
+                period=period,
+                year=year,
+                number=number,
+                defaults={'count': 1, 'total': weight, 'min_weight': weight, 'max_weight': weight}
+            )
+            if not created:
+                WeightRollup.objects.filter(pk=rollup.pk).update(
+                    count=F('count') + 1,
+                    total=F('total') + weight,
+                    min_weight=Least('min_weight', Value(weight)),
+                    max_weight=Greatest('max_weight', Value(weight))
+                )
+
+
+def remove_weight(user_id, date, weight):
+    with transaction.atomic():
+        for period, year, number in rollup_keys(date):
+            rollup = WeightRollup.objects.select_for_update().filter(
+                user_id=user_id, period=period, year=year, number=number
+            ).first()
+            if rollup is None:
+                continue
+
+            if rollup.count <= 1:
+                rollup.delete()
+                continue
+
+            rollup.count -= 1
+            rollup.total -= weight
+            if weight <= rollup.min_weight or weight >= rollup.max_weight:
+                # Solo se recorre el periodo afectado cuando se quitó un extremo
+                start, end = rollup_date_range(period, year, number)
+                bounds = WeightRecord.objects.filter(
+                    user_id=user_id, date__range=(start, end)
+                ).aggregate(min_weight=Min('weight'), max_weight=Max('weight'))
+                if bounds['min_weight'] is None:
+                    rollup.delete()
+                    continue
+                rollup.min_weight = bounds['min_weight']
+                rollup.max_weight = bounds['max_weight']
+            rollup.save(update_fields=['count', 'total', 'min_weight', 'max_weight'])
+
+
+def rebuild_weight_rollups(user_id):
+    """Recalcula todos los acumulados de un usuario a partir de sus registros"""
+    buckets = {}
+    for date, weight in WeightRecord.objects.filter(user_id=user_id).values_list('date', 'weight'):
+        for key in rollup_keys(date):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [1, weight, weight, weight]
+            else:
+                bucket[0] += 1
+                bucket[1] += weight
+                bucket[2] = min(bucket[2], weight)
+                bucket[3] = max(bucket[3], weight)
+
+    with transaction.atomic():
+        WeightRollup.objects.filter(user_id=user_id).delete()
+        WeightRollup.objects.bulk_create([
+            WeightRollup(
+                user_id=user_id,
+                period=period,
+                year=year,
+                number=number,
+                count=count,
+                total=total,
+                min_weight=minimum,
+                max_weight=maximum
+            )
+            for (period, year, number), (count, total, minimum, maximum) in buckets.items()
+        ])
+
+
+def weight_rollup_series(user):
+    """Promedios semanales y mensuales para las gráficas, en orden cronológico"""
+    series = {'weekly': {}, 'monthly': {}}
+    for period, year, number, count, total in WeightRollup.objects.filter(user=user).order_by(
+        'year', 'number'
+    ).values_list('period', 'year', 'number', 'count', 'total'):
+        if period == WeightRollup.PERIOD_WEEK:
+            series['weekly'][f'Semana {number} {year}'] = total / count
+        else:
+            series['monthly'][f'{MONTH_LABELS[number - 1]} {year}'] = total / count
+    return series
@@ -0,0 +1,145 @@
+from array import array
+from datetime import timedelta
+
+from .models import BodyMeasurement, WeightRecord
+
+# Métrica -> (modelo, campo) disponibles para las series de las gráficas
+SERIES_FIELDS = {
+    'weight': (WeightRecord, 'weight'),
+    'trend': (WeightRecord, 'trend'),
+    'chest': (BodyMeasurement, 'chest'),
+    'waist': (BodyMeasurement, 'waist'),
+    'hips': (BodyMeasurement, 'hips'),
+    'arms': (BodyMeasurement, 'arms'),
+    'thighs': (BodyMeasurement, 'thighs'),
+}
+
+RESOLUTIONS = ('day', 'week', 'month')
+
+
+def lttb(xs, ys, threshold):
+    """Índices elegidos por Largest-Triangle-Three-Buckets.
+
+    Conserva el primer y el último punto y, en cada tramo intermedio, el punto
+    que forma el triángulo de mayor área con el punto elegido anteriormente y
+    el promedio del tramo siguiente; así se mantienen los picos visibles.
+    """
+    length = len(xs)
+    if threshold >= length or threshold < 3:
+        return list(range(length))
+
+    every = (length - 2) / (threshold - 2)
+    selected = [0]
+    anchor = 0
+    for bucket in range(threshold - 2):
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, length)
+        next_count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / next_count
+        avg_y = sum(ys[next_start:next_end]) / next_count
+
+        anchor_x, anchor_y = xs[anchor], ys[anchor]
+        best_area = -1
+        best_index = next_start - 1
+        for index in range(int(bucket * every) + 1, next_start):
+            area = abs(
+                (anchor_x - avg_x) * (ys[index] - anchor_y)
+                - (anchor_x - xs[index]) * (avg_y - anchor_y)
+            )
+            if area > best_area:
+                best_area = area
+                best_index = index
+        selected.append(best_index)
+        anchor = best_index
+
+    selected.append(length - 1)
+    return selected
+
+
+def bucket_start(date, resolution):
+    if resolution == 'week':
+        return date - timedelta(days=date.weekday())
+    if resolution == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def bucket_average(dates, values, resolution):
+    """Promedia los valores por semana o mes; ``dates`` debe venir ordenado"""
+    if resolution == 'day':
+        return dates, values
+
+    bucket_dates = []
+    bucket_values = array('d')
+    current = None
+    total = 0.0
+    count = 0
+    for date, value in zip(dates, values):
+        start = bucket_start(date, resolution)
+        if start != current:
+            if count:
+                bucket_dates.append(current)
+                bucket_values.append(total / count)
+            current, total, count = start, 0.0, 0
+        total += value
+        count += 1
+    if count:
+        bucket_dates.append(current)
+        bucket_values.append(total / count)
+    return bucket_dates, bucket_values
+
+
+def downsample(dates, values, points):
+    """Reduce una serie ordenada a como máximo ``points`` puntos con LTTB"""
+    indices = lttb([date.toordinal() for date in dates], values, points)
+    if len(indices) == len(dates):
+        return dates, values
+    return [dates[index] for index in indices], array('d', (values[index] for index in indices))
+
+
+def series_payload(dates, values, points, resolution='day'):
+    dates, values = bucket_average(dates, values, resolution)
+    count = len(dates)
+    dates, values = downsample(dates, values, points)
+    return {
+        'resolution': resolution,
+        'count': count,
+        'dates': [date.strftime('%Y-%m-%d') for date in dates],
+        'values': [round(value, 2) for value in values],
+    }
+
+
+def load_series(user, metric, start=None, end=None):
+    """Fechas y valores no nulos de una métrica, en orden cronológico"""
+    model, field = SERIES_FIELDS[metric]
+    queryset = model.objects.filter(user=user, **{f'{field}__isnull': False})
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+
+    dates = []
+    values = array('d')
+    for date, value in queryset.order_by('date').values_list('date', field):
+        dates.append(date)
+        values.append(value)
+    return dates, values
+
+
+def load_series_group(user, metrics):
+    """Varias series del mismo modelo con una sola consulta: ``{metric: (fechas, valores)}``.
+
+    Cada serie conserva solo sus valores no nulos, igual que ``load_series``.
+    """
+    model = SERIES_FIELDS[metrics[0]][0]
+    fields = [SERIES_FIELDS[metric][1] for metric in metrics]
+    if any(SERIES_FIELDS[metric][0] is not model for metric in metrics):
+        raise ValueError('Las métricas deben ser del mismo modelo')
+
+    series = {metric: ([], array('d')) for metric in metrics}
+    for date, *row in model.objects.filter(user=user).order_by('date').values_list('date', *fields):
+        for metric, value in zip(metrics, row):
+            if value is not None:
+                series[metric][0].append(date)
+                series[metric][1].append(value)
+    return series
@@ -0,0 +1,74 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.signals import is_cascade
+
+from . import rollups, trends
+from .cleanup import delete_files_on_commit
+from .models import BodyMeasurement, PhotoBlob, ProgressPhoto, WeightRecord
+from .summary import refresh_summary
+
+
+# ==================== ACUMULADOS, TENDENCIA Y RESUMEN DE PESO ====================
+
+@receiver(pre_save, sender=WeightRecord)
+def remember_previous_weight(sender, instance, **kwargs):
+    instance._previous_weight = None
+    if instance.pk:
+        instance._previous_weight = WeightRecord.objects.filter(pk=instance.pk).values_list(
+            'date', 'weight'
+        ).first()
+
+@receiver(post_save, sender=WeightRecord)
+def weight_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_weight', None)
+    if previous == (instance.date, instance.weight):
+        return
+    if previous:
+        rollups.remove_weight(instance.user_id, *previous)
+    rollups.add_weight(instance.user_id, instance.date, instance.weight)
+    # La tendencia solo cambia desde la fecha más antigua afectada
+    trends.update_trends(instance.user_id, min(previous[0], instance.date) if previous else instance.date)
+    refresh_summary(instance.user_id, WeightRecord)
+
+@receiver(post_delete, sender=WeightRecord)
+def weight_deleted(sender, instance, origin=None, **kwargs):
+    if not is_cascade(instance, origin):
+        rollups.remove_weight(instance.user_id, instance.date, instance.weight)
+        trends.update_trends(instance.user_id, instance.date)
+        refresh_summary(instance.user_id, WeightRecord)
+
+# ==================== RESUMEN DE MEDIDAS Y FOTOS ====================
+
+@receiver(post_save, sender=BodyMeasurement)
+@receiver(post_delete, sender=BodyMeasurement)
+@receiver(post_delete, sender=ProgressPhoto)
+def tracking_record_changed(sender, instance, origin=None, **kwargs):
+    # Al borrar el usuario el resumen cae en la misma cascada
+    if not is_cascade(instance, origin):
+        refresh_summary(instance.user_id, sender)
+
+@receiver(post_save, sender=ProgressPhoto)
+def photo_saved(sender, instance, update_fields=None, **kwargs):
+    # El worker guarda versiones y estado; eso no cambia fechas ni conteos
+    if update_fields is None or 'date' in update_fields:
+        refresh_summary(instance.user_id, ProgressPhoto)
+
+# ==================== ARCHIVOS DE FOTOS ====================
+
+@receiver(post_delete, sender=ProgressPhoto)
+def photo_deleted(sender, instance, **kwargs):
+    """Libera el archivo también en borrados por queryset, en cascada o desde el admin.
+
+    Los archivos se eliminan tras el commit y en segundo plano, así que la
+    petición no espera al disco y un rollback no deja filas sin archivo.
+    """
+    names = []
+    if instance.blob_id:
+        # Las versiones derivan del archivo compartido, así que se borran con la última referencia
+        freed = PhotoBlob.release(instance.blob_id)
+        if freed:
+            names = [freed.name, *instance.rendition_names()]
+    elif instance.photo:
+        names = [instance.photo.name, *instance.rendition_names()]
+    delete_files_on_commit(instance.photo.storage, names)
@@ -0,0 +1,106 @@
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .history import MEASUREMENT_FIELDS
+from .models import BodyMeasurement, ProgressPhoto, TrackingSummary, WeightRecord
+
+
+def _window_start():
+    return TrackingSummary.window_start(timezone.localdate())
+
+
+def weight_section(user_id):
+    records = WeightRecord.objects.filter(user_id=user_id)
+    totals = records.aggregate(count=Count('id'), minimum=Min('weight'), maximum=Max('weight'))
+    first = records.order_by('date', 'id').values_list('date', 'weight').first() or (None, None)
+    latest = records.order_by('-date', '-id').values_list('date', 'weight').first() or (None, None)
+    return {
+        'analytics': {},
+        'weight_count': totals['count'],
+        'min_weight': totals['minimum'],
+        'max_weight': totals['maximum'],
+        'first_weight_date': first[0],
+        'first_weight': first[1],
+        'latest_weight_date': latest[0],
+        'latest_weight': latest[1],
+        'recent_weights': {
+            day.isoformat(): weight
+            for day, weight in records.filter(date__gte=_window_start()).values_list('date', 'weight')
+        },
+    }
+
+
+def measurement_section(user_id):
+    records = BodyMeasurement.objects.filter(user_id=user_id)
+    latest = records.order_by('-date', '-id').values('date', *MEASUREMENT_FIELDS).first()
+    return {
+        'analytics': {},
+        'measurement_count': records.count(),
+        'latest_measurement_date': latest.pop('date') if latest else None,
+        'latest_measurement': latest or {},
+        'recent_measurements': [
+            day.isoformat()
+            for day in records.filter(date__gte=_window_start()).order_by('date').values_list('date', flat=True)
+        ],
+    }
+
+
+def photo_section(user_id):
+    photos = ProgressPhoto.objects.filter(user_id=user_id)
+    totals = photos.aggregate(count=Count('id'), latest=Max('date'))
+    return {
+        'photo_count': totals['count'],
+        'latest_photo_date': totals['latest'],
+        'recent_photos': {
+            day.isoformat(): count
+            for day, count in photos.filter(date__gte=_window_start()).values('date').annotate(
+                count=Count('id')
+            ).order_by().values_list('date', 'count')
+        },
+    }
+
+
+SECTIONS = {
+    WeightRecord: weight_section,
+    BodyMeasurement: measurement_section,
+    ProgressPhoto: photo_section,
+}
+
+
+def refresh_summary(user_id, *models):
+    """Recalcula las secciones de los modelos indicados (todas si no se indica ninguno).
+
+    Cada sección son unas pocas consultas agregadas (conteo, mínimo, máximo,
+    primero y último) sobre los registros del usuario: la base de datos recorre
+    su historial, pero ninguna fila se carga en Python.
+    """
+    values = {}
+    for model in models or SECTIONS:
+        values.update(SECTIONS[model](user_id))
+    summary, _ = TrackingSummary.objects.update_or_create(user_id=user_id, defaults=values)
+    return summary
+
+
+def get_summary(user):
+    """Resumen del usuario con una búsqueda por clave primaria; se crea si aún no existe"""
+    summary = TrackingSummary.objects.filter(pk=user.pk).first()
+    if summary is None:
+        summary = refresh_summary(user.pk)
+    return summary
+
+
+def cached_analytics(user, key, compute):
+    """Resultado de ``compute()`` guardado en el resumen hasta la próxima escritura.
+
+    Solo se guarda si el resumen no cambió mientras se calculaba; así una
+    escritura concurrente no queda tapada por un resultado con datos viejos.
+    """
+    summary = get_summary(user)
+    if key in summary.analytics:
+        return summary.analytics[key]
+
+    result = compute()
+    TrackingSummary.objects.filter(pk=summary.pk, updated_at=summary.updated_at).update(
+        analytics={**summary.analytics, key: result}
+    )
+    return result
@@ -1,3 +1,1081 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .analytics import asof_join, rolling_correlation
+from .calendars import month_weeks
+from . import cleanup
+from .cleanup import flush_deletions, walk_storage
+from .columns import MeasurementColumns
+from .history import decode_cursor
+from .models import BodyMeasurement, PhotoBlob, ProgressPhoto, TrackingSummary, WeightRecord, WeightRollup
+from .rollups import rebuild_weight_rollups, weight_rollup_series
+from .series import bucket_average, load_series, load_series_group, lttb
+from .summary import get_summary
+from .trends import fit_line, update_trends
+from .upserts import bulk_upsert_daily
+
+
+class TrackingSummaryWeightStatsTests(SimpleTestCase):
+    def setUp(self):
+        self.today = date(2024, 3, 31)
+        self.summary = TrackingSummary(
+            weight_count=4,
+            first_weight=90.0, first_weight_date=date(2024, 1, 1),
+            latest_weight=86.5, latest_weight_date=date(2024, 3, 30),
+            min_weight=86.5, max_weight=90.0,
+            recent_weights={'2024-03-10': 88.0, '2024-03-20': 89.0, '2024-03-30': 86.5},
+        )
+
+    def test_stats_from_summary_fields(self):
+        stats = self.summary.weight_stats(self.today)
+
+        self.assertEqual(stats['inicio'], {'peso': 90.0, 'fecha': date(2024, 1, 1)})
+        self.assertEqual(stats['actual'], {'peso': 86.5, 'fecha': date(2024, 3, 30)})
+        self.assertEqual(stats['cambio_total'], -3.5)
+        self.assertEqual((stats['min'], stats['max']), (86.5, 90.0))
+        self.assertEqual(stats['cambio_mes'], -1.5)
+        self.assertAlmostEqual(stats['promedio_mes'], (88.0 + 89.0 + 86.5) / 3)
+
+    def test_window_without_records_falls_back_to_current_weight(self):
+        stats = self.summary.weight_stats(self.today + timedelta(days=60))
+        self.assertEqual(stats['cambio_mes'], 0)
+        self.assertEqual(stats['promedio_mes'], 86.5)
+
+    def test_empty_history(self):
+        self.assertEqual(TrackingSummary().weight_stats(self.today), {})
+
+
+class SeriesDownsamplingTests(SimpleTestCase):
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        xs = list(range(100))
+        ys = [0.0] * 100
+        ys[37] = 10.0
+
+        indices = lttb(xs, ys, 10)
+
+        self.assertEqual(len(indices), 10)
+        self.assertEqual((indices[0], indices[-1]), (0, 99))
+        self.assertIn(37, indices)
+        self.assertEqual(indices, sorted(indices))
+
+    def test_lttb_returns_all_points_below_threshold(self):
+        self.assertEqual(lttb([1, 2, 3], [1.0, 2.0, 3.0], 10), [0, 1, 2])
+
+    def test_bucket_average_by_month(self):
+        dates = [date(2024, 1, 5), date(2024, 1, 20), date(2024, 2, 1)]
+        bucket_dates, values = bucket_average(dates, [80.0, 82.0, 79.0], 'month')
+
+        self.assertEqual(bucket_dates, [date(2024, 1, 1), date(2024, 2, 1)])
+        self.assertEqual(list(values), [81.0, 79.0])
+
+
+class TrackingViewTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='tracking@example.com',
+            password='strong-password'
+        )
+        self.client.force_login(self.user)
+        self.today = date.today()
+
+
+class WeightTrackerViewTests(TrackingViewTestCase):
+    def test_weight_tracker_renders_stats_and_history(self):
+        for days_ago, weight in [(2, 80.0), (1, 79.0), (0, 79.5)]:
+            record = WeightRecord.objects.create(user=self.user, weight=weight)
+            WeightRecord.objects.filter(pk=record.pk).update(date=self.today - timedelta(days=days_ago))
+
+        response = self.client.get(reverse('tracking:weight_tracker'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats']['cambio_total'], -0.5)
+        self.assertEqual([row.weight for row in response.context['weight_records']], [79.5, 79.0, 80.0])
+
+
+class HistoryPaginationTests(TrackingViewTestCase):
+    def _weights(self, count):
+        for days_ago in reversed(range(count)):
+            record = WeightRecord.objects.create(user=self.user, weight=80 + days_ago % 3)
+            WeightRecord.objects.filter(pk=record.pk).update(date=self.today - timedelta(days=days_ago))
+
+    def test_weight_history_pages_with_cursor_and_sql_deltas(self):
+        self._weights(60)
+        url = reverse('tracking:weight_tracker')
+
+        first = self.client.get(url)
+        rows = first.context['weight_records']
+        self.assertEqual(len(rows), 50)
+        self.assertEqual(rows[0].date, self.today)
+        # Hoy pesa 80 y ayer 81: el cambio se calcula contra el registro anterior
+        self.assertEqual((rows[0].change, rows[0].change_symbol), (1.0, '↓'))
+        next_cursor = first.context['next_cursor']
+        self.assertEqual(decode_cursor(next_cursor), (rows[-1].date, rows[-1].id))
+
+        second = self.client.get(url, {'cursor': next_cursor})
+        older = second.context['weight_records']
+        self.assertEqual(len(older), 10)
+        self.assertIsNone(second.context['next_cursor'])
+        self.assertEqual(older[0].date, rows[-1].date - timedelta(days=1))
+        # El cambio de la primera fila de la página usa el registro de la página siguiente
+        self.assertIsNotNone(older[0].change_symbol)
+        self.assertIsNone(older[-1].change_symbol)
+        self.assertContains(second, 'Volver al inicio')
+
+    def test_invalid_cursor_starts_from_newest(self):
+        self._weights(3)
+        response = self.client.get(reverse('tracking:weight_tracker'), {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.context['weight_records'][0].date, self.today)
+
+    def test_measurement_changes_skip_missing_values(self):
+        for days_ago, waist, hips in [(2, 90.0, 100.0), (1, 88.5, None), (0, 89.0, 99.0)]:
+            measurement = BodyMeasurement.objects.create(user=self.user, waist=waist, hips=hips)
+            BodyMeasurement.objects.filter(pk=measurement.pk).update(date=self.today - timedelta(days=days_ago))
+
+        response = self.client.get(reverse('tracking:measurements'))
+
+        latest, middle, oldest = response.context['measurements']
+        self.assertEqual((latest.waist.change, latest.waist.change_symbol), (0.5, '↑'))
+        # La cadera se compara con el último día que la tuvo, no con el anterior vacío
+        self.assertEqual((latest.hips.change, latest.hips.change_symbol), (1.0, '↓'))
+        self.assertEqual(middle.hips, (None, None, None))
+        self.assertEqual((middle.waist.change, middle.waist.change_symbol), (1.5, '↓'))
+        self.assertIsNone(oldest.waist.change)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_measurement_history_pages_with_cursor(self):
+        for days_ago in range(60):
+            BodyMeasurement.objects.create(
+                user=self.user, date=self.today - timedelta(days=days_ago),
+                waist=90.0 - days_ago % 3, hips=None if days_ago % 2 else 100.0 - days_ago % 4
+            )
+        url = reverse('tracking:measurements')
+        first = self.client.get(url).context
+        self.assertEqual(len(first['measurements']), 50)
+
+        with self.assertNumQueries(4):  # sesión, usuario, página y gráfica
+            second = self.client.get(url, {'cursor': first['next_cursor']}).context
+        older = second['measurements']
+        self.assertEqual(len(older), 10)
+        self.assertIsNone(second['next_cursor'])
+        # Hace 51 días no hay cadera: la de hace 50 se compara con la de hace 52
+        self.assertEqual(older[0].date, self.today - timedelta(days=50))
+        self.assertEqual((older[0].hips.change, older[0].hips.change_symbol), (2.0, '↓'))
+        self.assertIsNone(older[-1].waist.change)
+
+
+class DailyUpsertTests(TrackingViewTestCase):
+    def _sync(self, url_name, records):
+        return self.client.post(
+            reverse(url_name),
+            data=json.dumps({'records': records}),
+            content_type='application/json'
+        )
+
+    def test_form_posts_update_todays_record(self):
+        url = reverse('tracking:weight_tracker')
+        self.client.post(url, {'weight': '80.0', 'notes': ''})
+        self.client.post(url, {'weight': '79.4', 'notes': 'tarde'})
+
+        record = WeightRecord.objects.get(user=self.user)
+        self.assertEqual((record.date, record.weight, record.notes), (self.today, 79.4, 'tarde'))
+        month = WeightRollup.objects.get(user=self.user, period='month')
+        self.assertEqual((month.count, month.total), (1, 79.4))
+
+    def test_weight_sync_upserts_days_and_rebuilds_rollups(self):
+        WeightRecord.objects.create(user=self.user, date=date(2024, 3, 1), weight=90.0)
+
+        response = self._sync('tracking:weight_sync', [
+            {'date': '2024-03-01', 'weight': 85.0},
+            {'date': '2024-03-02', 'weight': 84.0, 'notes': 'báscula'},
+            {'date': '2024-03-02', 'weight': 83.5},
+        ])
+
+        self.assertEqual(response.json(), {'status': 'success', 'count': 2})
+        weights = dict(WeightRecord.objects.filter(user=self.user).values_list('date', 'weight'))
+        self.assertEqual(weights, {date(2024, 3, 1): 85.0, date(2024, 3, 2): 83.5})
+        month = WeightRollup.objects.get(user=self.user, period='month', year=2024, number=3)
+        self.assertEqual((month.count, month.total, month.max_weight), (2, 168.5, 85.0))
+
+    def test_sync_with_invalid_record_writes_nothing(self):
+        response = self._sync('tracking:measurements_sync', [
+            {'date': '2024-03-01', 'waist': 80},
+            {'date': 'ayer', 'waist': 'mucho'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['records'][0]['index'], 1)
+        self.assertFalse(BodyMeasurement.objects.exists())
+
+
+class TrackingImportTests(TrackingViewTestCase):
+    def test_import_command_reads_csv_and_rebuilds_rollups(self):
+        WeightRecord.objects.create(user=self.user, date=date(2024, 1, 2), weight=90.0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'peso.csv')
+            with open(path, 'w', encoding='utf-8') as source:
+                source.write('date,weight,notes\n2024-01-01,82.4,\n2024-01-02,82.0,báscula\n')
+            call_command('import_tracking', path, user=self.user.email, batch_size=1, stdout=StringIO())
+
+        weights = dict(WeightRecord.objects.filter(user=self.user).values_list('date', 'weight'))
+        self.assertEqual(weights, {date(2024, 1, 1): 82.4, date(2024, 1, 2): 82.0})
+        month = WeightRollup.objects.get(user=self.user, period='month', year=2024, number=1)
+        self.assertEqual((month.count, month.min_weight, month.max_weight), (2, 82.0, 82.4))
+
+    def test_import_command_rejects_invalid_rows(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'peso.json')
+            with open(path, 'w', encoding='utf-8') as source:
+                json.dump([{'date': '2024-01-01', 'weight': 80}, {'date': '2024-01-02'}], source)
+            with self.assertRaises(CommandError):
+                call_command('import_tracking', path, user=self.user.email, stdout=StringIO(), stderr=StringIO())
+
+        self.assertFalse(WeightRecord.objects.exists())
+
+    def test_upload_view_imports_measurements(self):
+        upload = SimpleUploadedFile(
+            'medidas.json',
+            json.dumps({'records': [{'date': '2024-02-01', 'waist': 86.5, 'hips': 98}]}).encode(),
+            content_type='application/json'
+        )
+
+        response = self.client.post(reverse('tracking:import'), {'kind': 'measurements', 'file': upload})
+
+        self.assertRedirects(response, reverse('tracking:measurements'))
+        measurement = BodyMeasurement.objects.get(user=self.user)
+        self.assertEqual((measurement.date, measurement.waist, measurement.chest), (date(2024, 2, 1), 86.5, None))
+
+    def test_upload_view_reports_unsupported_format(self):
+        upload = SimpleUploadedFile('peso.txt', b'80')
+        response = self.client.post(reverse('tracking:import'), {'kind': 'weight', 'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Formato no soportado')
+
+
+class WeightRollupTests(TrackingViewTestCase):
+    def _record(self, day, weight):
+        return WeightRecord.objects.create(user=self.user, date=day, weight=weight)
+
+    def _rollup(self, period, year, number):
+        return WeightRollup.objects.get(user=self.user, period=period, year=year, number=number)
+
+    def test_weeks_of_different_years_are_kept_apart(self):
+        self._record(date(2023, 1, 18), 90.0)
+        self._record(date(2024, 1, 17), 80.0)
+
+        self.assertEqual(self._rollup('week', 2023, 3).total, 90.0)
+        self.assertEqual(self._rollup('week', 2024, 3).total, 80.0)
+        series = weight_rollup_series(self.user)
+        self.assertEqual(series['weekly'], {'Semana 3 2023': 90.0, 'Semana 3 2024': 80.0})
+        self.assertEqual(series['monthly'], {'Ene 2023': 90.0, 'Ene 2024': 80.0})
+
+    def test_update_and_delete_adjust_rollups(self):
+        low = self._record(date(2024, 5, 6), 70.0)
+        self._record(date(2024, 5, 7), 72.0)
+        high = self._record(date(2024, 5, 8), 75.0)
+
+        high.weight = 73.0
+        high.save()
+        low.delete()
+
+        month = self._rollup('month', 2024, 5)
+        self.assertEqual(month.count, 2)
+        self.assertEqual(month.total, 145.0)
+        self.assertEqual((month.min_weight, month.max_weight), (72.0, 73.0))
+
+        rebuild_weight_rollups(self.user.id)
+        rebuilt = self._rollup('month', 2024, 5)
+        self.assertEqual((rebuilt.count, rebuilt.total, rebuilt.min_weight), (2, 145.0, 72.0))
+
+
+class ChartSeriesViewTests(TrackingViewTestCase):
+    def setUp(self):
+        super().setUp()
+        for days_ago in reversed(range(40)):
+            record = WeightRecord.objects.create(user=self.user, weight=80 + days_ago % 3)
+            WeightRecord.objects.filter(pk=record.pk).update(date=self.today - timedelta(days=days_ago))
+        self.url = reverse('tracking:chart_series')
+
+    def test_series_is_downsampled_and_cacheable(self):
+        response = self.client.get(self.url, {'metric': 'weight', 'points': 10})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 40)
+        self.assertEqual(len(data['dates']), 10)
+        self.assertIn('private', response['Cache-Control'])
+
+        cached = self.client.get(self.url, {'metric': 'weight', 'points': 10}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_series_respects_date_range(self):
+        start = (self.today - timedelta(days=9)).strftime('%Y-%m-%d')
+        data = self.client.get(self.url, {'metric': 'weight', 'start': start}).json()
+        self.assertEqual(data['count'], 10)
+
+    def test_invalid_metric_is_rejected(self):
+        response = self.client.get(self.url, {'metric': 'altura'})
+        self.assertEqual(response.status_code, 400)
+
+
+def make_image(name='foto.jpg', size=(2000, 1000), orientation=None, color='red'):
+    """Archivo JPEG en memoria, opcionalmente con orientación y cámara en el EXIF"""
+    image = Image.new('RGB', size, color)
+    exif = image.getexif()
+    exif[0x010F] = 'Cámara de prueba'
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif.tobytes())
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class PhotoTestCase(TrackingViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+class PhotoRenditionTests(PhotoTestCase):
+    def test_upload_creates_oriented_renditions_without_metadata(self):
+        response = self.client.post(reverse('tracking:photos'), {
+            'photo': make_image(orientation=6), 'photo_type': 'front', 'notes': ''
+        })
+        self.assertEqual(response.status_code, 302)
+
+        photo = ProgressPhoto.objects.get(user=self.user)
+        self.assertEqual((photo.status, photo.renditions), (ProgressPhoto.STATUS_PENDING, {}))
+        self.assertEqual(photo.thumb_url, photo.url)
+
+        call_command('run_photo_worker', processes=0, once=True, stdout=StringIO())
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.status, ProgressPhoto.STATUS_READY)
+        self.assertEqual(set(photo.renditions), {'thumb', 'medium'})
+        thumb = photo.renditions['thumb']
+        # Orientación 6: la imagen de 2000x1000 se muestra girada, en vertical
+        self.assertEqual((thumb['width'], thumb['height']), (160, 320))
+        with Image.open(os.path.join(self.media_root, thumb['name'])) as rendition:
+            self.assertEqual(rendition.size, (160, 320))
+            self.assertEqual(dict(rendition.getexif()), {})
+        self.assertTrue(photo.thumb_url.endswith(thumb['name']))
+        self.assertIn(' 640w', photo.srcset)
+
+        data = self.client.get(reverse('tracking:get_photos_for_date'), {
+            'date': photo.date.strftime('%Y-%m-%d')
+        }).json()
+        self.assertEqual(data['photos'][0]['thumb_url'], photo.thumb_url)
+        self.assertEqual(data['photos'][0]['srcset'], photo.srcset)
+
+
+class PhotoWorkerTests(PhotoTestCase):
+    def _upload(self, upload):
+        self.client.post(reverse('tracking:photos'), {'photo': upload, 'photo_type': 'front'})
+        return ProgressPhoto.objects.latest('id')
+
+    def test_worker_pool_processes_pending_photos(self):
+        first = self._upload(make_image('a.jpg'))
+        second = self._upload(make_image('b.jpg', color='blue'))
+
+        call_command('run_photo_worker', processes=2, once=True, stdout=StringIO())
+
+        for photo in (first, second):
+            photo.refresh_from_db()
+            self.assertEqual(photo.status, ProgressPhoto.STATUS_READY)
+            self.assertEqual(photo.attempts, 1)
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, photo.renditions['thumb']['name'])))
+
+    def test_failed_processing_is_retried_with_backoff_then_marked_failed(self):
+        photo = self._upload(make_image())
+        with open(os.path.join(self.media_root, photo.photo.name), 'wb') as broken:
+            broken.write(b'no es una imagen')
+
+        call_command('run_photo_worker', processes=0, once=True, stdout=StringIO(), stderr=StringIO())
+
+        photo.refresh_from_db()
+        self.assertEqual((photo.status, photo.attempts), (ProgressPhoto.STATUS_PENDING, 1))
+        self.assertGreater(photo.available_at, timezone.now())
+        self.assertTrue(photo.last_error)
+
+        ProgressPhoto.objects.filter(pk=photo.pk).update(available_at=timezone.now())
+        call_command('run_photo_worker', processes=0, once=True, max_attempts=2, stdout=StringIO(), stderr=StringIO())
+
+        photo.refresh_from_db()
+        self.assertEqual((photo.status, photo.attempts), (ProgressPhoto.STATUS_FAILED, 2))
+
+    def test_stale_processing_photos_are_requeued(self):
+        photo = self._upload(make_image())
+        ProgressPhoto.objects.filter(pk=photo.pk).update(
+            status=ProgressPhoto.STATUS_PROCESSING,
+            available_at=timezone.now() - timedelta(hours=1)
+        )
+
+        call_command('run_photo_worker', processes=0, once=True, stdout=StringIO())
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.status, ProgressPhoto.STATUS_READY)
+
+
+class PhotoUploadSessionTests(PhotoTestCase):
+    def _stored_files(self):
+        return [name for _, _, files in os.walk(self.media_root) for name in files]
+
+    def test_session_upload_creates_one_photo_per_angle(self):
+        response = self.client.post(reverse('tracking:photo_upload_session'), {
+            'front': make_image('frente.jpg'),
+            'side': make_image('lado.jpg', color='blue'),
+            'back': make_image('espalda.jpg', color='green'),
+            'notes': 'semana 4',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([photo['type'] for photo in data['photos']], ['Frente', 'Lateral', 'Espalda'])
+        self.assertEqual(ProgressPhoto.objects.filter(user=self.user, notes='semana 4').count(), 3)
+        self.assertTrue(all(photo['status'] == ProgressPhoto.STATUS_PENDING for photo in data['photos']))
+        self.assertEqual(len(self._stored_files()), 3)
+
+    def test_invalid_file_rejects_the_whole_session(self):
+        response = self.client.post(reverse('tracking:photo_upload_session'), {
+            'front': make_image(),
+            'side': SimpleUploadedFile('lado.jpg', b'no es una imagen', content_type='image/jpeg'),
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('side', response.json()['errors'])
+        self.assertFalse(ProgressPhoto.objects.exists())
+        self.assertEqual(self._stored_files(), [])
+
+    def test_session_without_files_is_rejected(self):
+        response = self.client.post(reverse('tracking:photo_upload_session'), {'notes': 'nada'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PhotoBlobStorageTests(PhotoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.upload = make_image('original.JPG')
+        self.content = self.upload.read()
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+    def _upload(self, photo_type='front'):
+        upload = SimpleUploadedFile('foto.jpg', self.content, content_type='image/jpeg')
+        self.client.post(reverse('tracking:photos'), {'photo': upload, 'photo_type': photo_type})
+        return ProgressPhoto.objects.latest('id')
+
+    def test_hash_is_computed_while_receiving_and_stored_in_shards(self):
+        with mock.patch('tracking.uploads.hash_file', side_effect=AssertionError('se releyó el archivo')):
+            photo = self._upload()
+
+        expected = f'progress_photos/{self.sha256[:2]}/{self.sha256[2:4]}/{self.sha256}.jpg'
+        self.assertEqual(photo.photo.name, expected)
+        self.assertEqual((photo.blob.sha256, photo.blob.ref_count), (self.sha256, 1))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, expected)))
+
+class PhotoDeletionTests(TransactionTestCase):
+    """Borrados confirmados de verdad: el hilo de borrado consulta la base con su propia conexión"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='tracking@example.com',
+            password='strong-password'
+        )
+        self.client.force_login(self.user)
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.upload = make_image('original.JPG')
+        self.content = self.upload.read()
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+    def _upload(self, photo_type='front'):
+        upload = SimpleUploadedFile('foto.jpg', self.content, content_type='image/jpeg')
+        self.client.post(reverse('tracking:photos'), {'photo': upload, 'photo_type': photo_type})
+        return ProgressPhoto.objects.latest('id')
+
+    def test_delete_removes_renditions(self):
+        self.client.post(reverse('tracking:photos'), {'photo': make_image(), 'photo_type': 'side'})
+        call_command('run_photo_worker', processes=0, once=True, stdout=StringIO())
+        photo = ProgressPhoto.objects.get(user=self.user)
+        paths = [os.path.join(self.media_root, rendition['name']) for rendition in photo.renditions.values()]
+
+        self.client.post(reverse('tracking:photo_delete', args=[photo.pk]))
+        flush_deletions()
+
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def test_duplicates_share_file_and_renditions_until_last_reference(self):
+        first = self._upload('front')
+        call_command('run_photo_worker', processes=0, once=True, stdout=StringIO())
+        second = self._upload('side')
+
+        first.refresh_from_db()
+        self.assertEqual(second.photo.name, first.photo.name)
+        self.assertEqual(PhotoBlob.objects.get().ref_count, 2)
+        # El duplicado reutiliza las versiones y no pasa por la cola
+        self.assertEqual((second.status, second.renditions), (ProgressPhoto.STATUS_READY, first.renditions))
+
+        paths = [os.path.join(self.media_root, name) for name in [first.photo.name, *first.rendition_names()]]
+        first.delete()
+        flush_deletions()
+        self.assertEqual(PhotoBlob.objects.get().ref_count, 1)
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+        ProgressPhoto.objects.filter(pk=second.pk).delete()
+        flush_deletions()
+        self.assertFalse(PhotoBlob.objects.exists())
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def test_reupload_before_pending_delete_keeps_the_file(self):
+        photo = self._upload()
+        path = os.path.join(self.media_root, photo.photo.name)
+
+        # Retiene el hilo de borrado para que la nueva subida llegue antes
+        gate = threading.Event()
+        cleanup._deleter.submit(gate.wait)
+        photo.delete()
+        again = self._upload()
+        gate.set()
+        flush_deletions()
+
+        self.assertEqual(again.photo.name, photo.photo.name)
+        self.assertEqual(PhotoBlob.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+        with open(path, 'rb') as file:
+            self.assertEqual(hashlib.sha256(file.read()).hexdigest(), self.sha256)
+
+
+class MediaGarbageCollectionTests(PhotoTestCase):
+    def _write(self, name, age_hours=2):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'x')
+        old = (timezone.now() - timedelta(hours=age_hours)).timestamp()
+        os.utime(path, (old, old))
+        return path
+
+    def test_walk_storage_matches_sorted_paths(self):
+        names = ['progress_photos/a.jpg', 'progress_photos/a/b.jpg', 'progress_photos/a-b.jpg', 'progress_photos/ab/c.jpg']
+        for name in names:
+            self._write(name)
+
+        storage = ProgressPhoto._meta.get_field('photo').storage
+        self.assertEqual(list(walk_storage(storage, 'progress_photos')), sorted(names))
+
+    def test_gc_media_deletes_only_old_orphans(self):
+        self.client.post(reverse('tracking:photos'), {'photo': make_image(), 'photo_type': 'front'})
+        call_command('run_photo_worker', processes=0, once=True, stdout=StringIO())
+        photo = ProgressPhoto.objects.get()
+        kept = [os.path.join(self.media_root, name) for name in [photo.photo.name, *photo.rendition_names()]]
+        for path in kept:
+            os.utime(path, (0, 0))
+
+        orphan = self._write('progress_photos/00/11/huerfano.jpg')
+        legacy = self._write(f'progress_photos/{self.user.id}/front/antigua.jpg')
+        recent = self._write('progress_photos/00/11/subiendo.jpg', age_hours=0)
+
+        dry_run = StringIO()
+        call_command('gc_media', dry_run=True, stdout=dry_run)
+        self.assertIn('2 archivos huérfanos encontrados', dry_run.getvalue())
+        self.assertTrue(os.path.exists(orphan))
+
+        call_command('gc_media', stdout=StringIO())
+
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(legacy))
+        self.assertTrue(os.path.exists(recent))
+        self.assertTrue(all(os.path.exists(path) for path in kept))
+
+
+class PhotoMediaViewTests(PhotoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.post(reverse('tracking:photos'), {'photo': make_image(), 'photo_type': 'front'})
+        self.photo = ProgressPhoto.objects.get()
+        with open(os.path.join(self.media_root, self.photo.photo.name), 'rb') as file:
+            self.content = file.read()
+
+    def test_owner_gets_file_with_immutable_cache_headers(self):
+        response = self.client.get(self.photo.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['ETag'], f'"{self.photo.blob.sha256}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        cached = self.client.get(self.photo.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_range_requests_return_partial_content(self):
+        response = self.client.get(self.photo.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+
+        suffix = self.client.get(self.photo.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(suffix.streaming_content), self.content[-5:])
+
+        outside = self.client.get(self.photo.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(outside.status_code, 416)
+
+        stale = self.client.get(self.photo.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otro"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_other_users_cannot_read_the_file(self):
+        other = get_user_model().objects.create_user(email='otra@example.com', password='strong-password')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.photo.url).status_code, 404)
+
+    @override_settings(MEDIA_SERVE_BACKEND='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_accel_redirect_delegates_to_web_server(self):
+        response = self.client.get(self.photo.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.photo.photo.name}')
+        self.assertEqual(response.content, b'')
+
+
+class PhotoRangeViewTests(PhotoTestCase):
+    def setUp(self):
+        super().setUp()
+        for day, photo_type in [(3, 'side'), (3, 'front'), (20, 'back'), (1, None)]:
+            self.client.post(reverse('tracking:photos'), {
+                'photo': make_image(color=(day * 10, 0, 0)),
+                'photo_type': photo_type or 'front',
+            })
+            photo = ProgressPhoto.objects.latest('id')
+            target = date(2024, 3, day) if photo_type else date(2024, 4, day)
+            ProgressPhoto.objects.filter(pk=photo.pk).update(date=target)
+        self.url = reverse('tracking:photos_range')
+
+    def test_month_is_grouped_by_date_in_one_query(self):
+        with self.assertNumQueries(3):  # sesión, usuario y fotos
+            response = self.client.get(self.url, {'year': 2024, 'month': 3})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['start'], data['end']), ('2024-03-01', '2024-03-31'))
+        self.assertEqual(list(data['dates']), ['2024-03-03', '2024-03-20'])
+        self.assertEqual([photo['type'] for photo in data['dates']['2024-03-03']], ['Frente', 'Lateral'])
+        self.assertIn('thumb_url', data['dates']['2024-03-20'][0])
+
+    def test_arbitrary_range_and_etag(self):
+        params = {'start': '2024-03-15', 'end': '2024-04-01'}
+        response = self.client.get(self.url, params)
+        self.assertEqual(list(response.json()['dates']), ['2024-03-20', '2024-04-01'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        cached = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        ProgressPhoto.objects.filter(date=date(2024, 4, 1)).update(notes='editada')
+        changed = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_invalid_ranges_are_rejected(self):
+        for params in [{}, {'year': 2024, 'month': 13}, {'start': '2024-03-01'},
+                       {'start': '2024-03-10', 'end': '2024-03-01'},
+                       {'start': '2020-01-01', 'end': '2024-01-01'}]:
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+
+class PhotoCalendarTests(TrackingViewTestCase):
+    def setUp(self):
+        super().setUp()
+        for day in [date(2024, 2, 29), date(2024, 2, 29), date(2024, 7, 14), date(2025, 1, 2)]:
+            photo = ProgressPhoto.objects.create(user=self.user, photo='progress_photos/x.jpg', photo_type='front')
+            ProgressPhoto.objects.filter(pk=photo.pk).update(date=day)
+
+    def test_month_weeks_are_cached_and_padded(self):
+        weeks = month_weeks(2024, 2)
+
+        self.assertIs(month_weeks(2024, 2), weeks)
+        self.assertEqual(weeks[0][:3], (None, None, None))
+        self.assertEqual(weeks[0][3], date(2024, 2, 1))
+        self.assertEqual(weeks[-1][3], date(2024, 2, 29))
+        self.assertTrue(all(len(week) == 7 for week in weeks))
+
+    def test_year_view_renders_twelve_months_with_one_count_query(self):
+        with self.assertNumQueries(3):  # sesión, usuario y conteos
+            response = self.client.get(reverse('tracking:photos_year'), {'year': 2024})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['months']), 12)
+        self.assertEqual(response.context['total'], 3)
+        self.assertEqual([month['total'] for month in response.context['months']][1], 2)
+        february = [day for week in response.context['months'][1]['weeks'] for day in week if day['day']]
+        self.assertEqual(february[-1]['photo_count'], 2)
+
+    def test_invalid_year_is_rejected(self):
+        url = reverse('tracking:photos_year')
+        for year in ['abc', '0', '99999', str(10 ** 20)]:
+            self.assertEqual(self.client.get(url, {'year': year}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('tracking:photos_counts'), {'year': 10 ** 20}).status_code, 400)
+
+    def test_month_view_uses_shared_layout(self):
+        response = self.client.get(reverse('tracking:photos'), {'year': 2024, 'month': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['calendar']), len(month_weeks(2024, 2)))
+        self.assertEqual(response.context['calendar'][0][0], {'day': '', 'has_photos': False})
+        self.assertEqual(response.context['next_month'], date(2024, 3, 1))
+        self.assertContains(response, 'data-count="2"')
+
+    def test_counts_api_covers_arbitrary_spans(self):
+        url = reverse('tracking:photos_counts')
+        data = self.client.get(url, {'start': '2024-07-01', 'end': '2025-06-30'}).json()
+        self.assertEqual(data['counts'], {'2024-07-14': 1, '2025-01-02': 1})
+
+        response = self.client.get(url, {'year': 2024})
+        self.assertEqual(response.json()['total'], 3)
+        cached = self.client.get(url, {'year': 2024}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        self.assertEqual(self.client.get(url, {'year': 'dos mil'}).status_code, 400)
+
+
+class PhotoCompareTests(TrackingViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.start = date(2024, 1, 1)
+        for days in range(30):
+            photo = ProgressPhoto.objects.create(user=self.user, photo=f'progress_photos/{days}.jpg', photo_type='front')
+            ProgressPhoto.objects.filter(pk=photo.pk).update(date=self.start + timedelta(days=days * 3))
+        ProgressPhoto.objects.create(user=self.user, photo='progress_photos/lado.jpg', photo_type='side')
+        self.url = reverse('tracking:photo_compare')
+
+    def test_gallery_is_paged_by_cursor(self):
+        response = self.client.get(self.url, {'type': 'front'})
+        first_page = response.context['photos']
+        self.assertEqual(len(first_page), 24)
+        self.assertEqual(first_page[0].date, self.start + timedelta(days=87))
+        self.assertContains(response, '?type=front&cursor=')
+
+        response = self.client.get(self.url, {'type': 'front', 'cursor': response.context['next_cursor']})
+        self.assertEqual([photo.date for photo in response.context['photos']][-1], self.start)
+        self.assertEqual(len(response.context['photos']), 6)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_compared_photos_and_month_index(self):
+        with self.assertNumQueries(5):  # sesión, usuario, galería, fotos comparadas y meses
+            response = self.client.get(self.url, {'type': 'front', 'date1': '2024-01-04', 'date2': '2024-03-01'})
+
+        self.assertEqual(response.context['photo1'].date, date(2024, 1, 4))
+        self.assertEqual(response.context['photo2'].date, date(2024, 3, 1))
+        self.assertEqual(
+            response.context['photo_months'],
+            [(date(2024, 3, 1), 10), (date(2024, 2, 1), 9), (date(2024, 1, 1), 11)]
+        )
+
+    def test_counts_can_be_filtered_by_type(self):
+        url = reverse('tracking:photos_counts')
+        data = self.client.get(url, {'start': '2024-01-01', 'end': '2024-01-10', 'type': 'front'}).json()
+        self.assertEqual(list(data['counts']), ['2024-01-01', '2024-01-04', '2024-01-07', '2024-01-10'])
+        self.assertEqual(self.client.get(url, {'year': 2024, 'type': 'arriba'}).status_code, 400)
+
+
+class PhotoComparisonImageTests(PhotoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.post(reverse('tracking:photos'), {'photo': make_image(color='red'), 'photo_type': 'front'})
+        self.client.post(reverse('tracking:photos'), {'photo': make_image(size=(600, 1200), color='blue'), 'photo_type': 'front'})
+        self.first, self.second = ProgressPhoto.objects.order_by('id')
+        self.url = reverse('tracking:photo_compare_image')
+
+    def _get(self, **params):
+        return self.client.get(self.url, {'photo1': self.first.pk, 'photo2': self.second.pk, 'height': 200, **params})
+
+    def test_side_by_side_image_is_cached_on_disk(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        with Image.open(BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (400 + 16 + 100, 200))
+
+        with mock.patch('tracking.comparisons.compose') as compose:
+            cached = self._get()
+        compose.assert_not_called()
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'comparisons'))), 1)
+
+    def test_overlay_and_diff_use_the_first_photo_frame(self):
+        call_command('run_photo_worker', processes=0, once=True, stdout=StringIO())
+        for mode in ['overlay', 'diff']:
+            response = self._get(mode=mode)
+            with Image.open(BytesIO(b''.join(response.streaming_content))) as image:
+                self.assertEqual(image.size, (400, 200))
+
+        diff = self._get(mode='diff')
+        self.assertNotEqual(diff['ETag'], self._get(mode='overlay')['ETag'])
+
+    def test_invalid_parameters_and_foreign_photos(self):
+        self.assertEqual(self._get(mode='collage').status_code, 400)
+        self.assertEqual(self._get(height=5000).status_code, 400)
+
+        other = get_user_model().objects.create_user(email='otra@example.com', password='strong-password')
+        self.client.force_login(other)
+        self.assertEqual(self._get().status_code, 404)
+
+
+class WeightTrendTests(TrackingViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.start = date(2024, 1, 1)
+
+    def _record(self, days, weight):
+        return WeightRecord.objects.create(user=self.user, date=self.start + timedelta(days=days), weight=weight)
+
+    def _trends(self):
+        return list(WeightRecord.objects.filter(user=self.user).order_by('date').values_list('trend', flat=True))
+
+    def test_trend_follows_weights_with_gaps(self):
+        self._record(0, 80)
+        self._record(1, 81)
+        self._record(3, 79)
+
+        trends = self._trends()
+        self.assertEqual(trends[0], 80)
+        self.assertAlmostEqual(trends[1], 80.1)
+        self.assertAlmostEqual(trends[2], 80.1 + 0.19 * (79 - 80.1))
+
+    def test_weight_and_trend_series_load_in_one_query(self):
+        for days in range(5):
+            self._record(days, 80 - days * 0.5)
+        WeightRecord.objects.filter(user=self.user, date=self.start).update(trend=None)
+
+        with self.assertNumQueries(1):
+            series = load_series_group(self.user, ['weight', 'trend'])
+        self.assertEqual(series['weight'], load_series(self.user, 'weight'))
+        self.assertEqual(series['trend'], load_series(self.user, 'trend'))
+        self.assertEqual(len(series['trend'][0]), 4)
+
+    def test_backfill_update_and_delete_recompute_only_the_suffix(self):
+        for days in range(10):
+            self._record(days * 2, 80 - days * 0.3)
+        self._record(5, 70)
+        middle = WeightRecord.objects.get(user=self.user, date=self.start + timedelta(days=8))
+        middle.weight = 90
+        middle.save()
+        WeightRecord.objects.get(user=self.user, date=self.start + timedelta(days=12)).delete()
+
+        expected = self._trends()
+        self.assertEqual(update_trends(self.user.id), 0)
+        self.assertEqual(self._trends(), expected)
+
+        latest = WeightRecord.objects.filter(user=self.user).latest('date')
+        with self.assertNumQueries(2):  # tendencia anterior y el sufijo de un registro
+            self.assertEqual(update_trends(self.user.id, latest.date), 0)
+
+    def test_bulk_upsert_updates_trends(self):
+        self._record(0, 80)
+        bulk_upsert_daily(WeightRecord, self.user, {
+            self.start + timedelta(days=1): {'weight': 82},
+            self.start + timedelta(days=2): {'weight': 82},
+        })
+        self.assertNotIn(None, self._trends())
+        self.assertEqual(update_trends(self.user.id), 0)
+
+    def test_fit_line(self):
+        slope, intercept = fit_line([0, 1, 2, 3], [5, 7, 9, 11])
+        self.assertAlmostEqual(slope, 2)
+        self.assertAlmostEqual(intercept, 5)
+        self.assertIsNone(fit_line([1], [2]))
+
+    def test_projection_endpoint(self):
+        url = reverse('tracking:weight_projection')
+        self.assertIsNone(self.client.get(url, {'goal': 70}).json()['estimated_date'])
+
+        for days in range(60):
+            self._record(days, 90 - days * 0.1)
+        data = self.client.get(url, {'goal': 80}).json()
+        self.assertEqual(data['points'], 28)
+        self.assertAlmostEqual(data['weekly_change'], -0.7, delta=0.1)
+        self.assertGreater(data['estimated_date'], (self.start + timedelta(days=59)).isoformat())
+
+        self.assertIsNone(self.client.get(url, {'goal': 95}).json()['estimated_date'])
+        self.assertEqual(self.client.get(url, {'goal': 'bajo'}).status_code, 400)
+
+
+class MeasurementColumnsTests(TrackingViewTestCase):
+    def test_chart_series_come_from_the_same_columns(self):
+        start = date(2024, 1, 1)
+        rows = [
+            (start + timedelta(days=index), 80.0 + index, None if index % 2 else 90.0, None, None, None)
+            for index in range(120)
+        ]
+        columns = MeasurementColumns(rows)
+        self.assertEqual(len(columns), 120)
+
+        chart = columns.chart_data(points=500)
+        self.assertEqual(chart['chest']['count'], 120)
+        self.assertEqual(chart['waist']['count'], 60)
+        self.assertEqual(chart['hips']['count'], 0)
+
+    def test_empty_history(self):
+        self.assertEqual(MeasurementColumns([]).chart_data(10)['waist']['count'], 0)
+
+    def test_measurements_view_uses_one_query_for_the_chart(self):
+        for days_ago in range(5):
+            BodyMeasurement.objects.create(user=self.user, date=self.today - timedelta(days=days_ago), waist=90 - days_ago)
+        with self.assertNumQueries(4):  # sesión, usuario, página y gráfica
+            response = self.client.get(reverse('tracking:measurements'))
+        self.assertEqual(len(response.context['measurements']), 5)
+
+    def test_benchmark_command_writes_report(self):
+        output = os.path.join(tempfile.mkdtemp(), 'benchmark.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(output), ignore_errors=True)
+        call_command('benchmark_measurements', records=200, iterations=2, seed=1, output=output, stdout=StringIO())
+
+        with open(output, encoding='utf-8') as file:
+            report = json.load(file)
+        self.assertEqual(report['dataset'], {'measurements': 200})
+        self.assertEqual(report['results']['chart']['queries'], 1)
+        self.assertEqual(report['results']['page']['queries'], 1)
+        self.assertEqual(report['results']['view']['status_code'], 200)
+        self.assertFalse(BodyMeasurement.objects.exists())
+
+
+class TrackingSummaryTests(TrackingViewTestCase):
+    def _summary(self):
+        return TrackingSummary.objects.get(pk=self.user.pk)
+
+    def test_weight_writes_keep_summary_in_sync_with_raw_statistics(self):
+        for days_ago, weight in [(45, 84.0), (20, 82.5), (10, 81.0), (0, 80.5)]:
+            WeightRecord.objects.create(user=self.user, date=self.today - timedelta(days=days_ago), weight=weight)
+        WeightRecord.objects.filter(user=self.user, weight=81.0).get().delete()
+        latest = WeightRecord.objects.get(user=self.user, date=self.today)
+        latest.weight = 80.0
+        latest.save()
+
+        summary = self._summary()
+        self.assertEqual(summary.weight_stats(self.today), {
+            'inicio': {'peso': 84.0, 'fecha': self.today - timedelta(days=45)},
+            'actual': {'peso': 80.0, 'fecha': self.today},
+            'cambio_total': -4.0,
+            'max': 84.0,
+            'min': 80.0,
+            'cambio_mes': -2.5,
+            'promedio_mes': 81.25,
+        })
+        self.assertEqual((summary.weight_count, summary.min_weight, summary.max_weight), (3, 80.0, 84.0))
+
+    def test_measurements_and_photo_sessions_update_recent_counts(self):
+        BodyMeasurement.objects.create(user=self.user, date=self.today, waist=88.0)
+        BodyMeasurement.objects.create(user=self.user, date=self.today - timedelta(days=60), waist=90.0)
+        media = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, media.options['MEDIA_ROOT'], ignore_errors=True)
+        self.client.post(reverse('tracking:photo_upload_session'), {
+            'front': make_image('frente.jpg'), 'side': make_image('lado.jpg', color='blue')
+        })
+
+        summary = self._summary()
+        self.assertEqual(summary.latest_measurement, {
+            'chest': None, 'waist': 88.0, 'hips': None, 'arms': None, 'thighs': None
+        })
+        self.assertEqual((summary.measurement_count, summary.photo_count), (2, 2))
+        self.assertEqual(summary.recent_records(self.today), 3)
+        # La ventana se evalúa al leer, así que envejece aunque no haya escrituras
+        self.assertEqual(summary.recent_records(self.today + timedelta(days=45)), 0)
+
+    def test_pages_read_summary_with_one_lookup(self):
+        WeightRecord.objects.create(user=self.user, date=self.today, weight=79.0)
+        TrackingSummary.objects.all().delete()
+
+        self.assertEqual(get_summary(self.user).latest_weight, 79.0)
+        with self.assertNumQueries(1):
+            get_summary(self.user)
+
+        response = self.client.get(reverse('tracking:weight_tracker'))
+        self.assertEqual(response.context['stats']['actual']['peso'], 79.0)
+
+        dashboard = self.client.get(reverse('dashboard'))
+        tracking_app = next(app for app in dashboard.context['apps'] if app['name'] == 'Seguimiento Físico')
+        self.assertEqual(tracking_app['stats'][0]['value'], '79.0 kg')
+
+    def test_deleting_the_user_removes_the_summary(self):
+        WeightRecord.objects.create(user=self.user, date=self.today, weight=79.0)
+        BodyMeasurement.objects.create(user=self.user, date=self.today, waist=88.0)
+        self.user.delete()
+        self.assertFalse(TrackingSummary.objects.exists())
+
+
+class BodyCompositionAnalyticsTests(TrackingViewTestCase):
+    def test_asof_join_uses_latest_weight_within_tolerance(self):
+        weight_dates = [date(2024, 1, 1), date(2024, 1, 5), date(2024, 1, 20)]
+        joined = asof_join(
+            [date(2023, 12, 31), date(2024, 1, 5), date(2024, 1, 9), date(2024, 1, 15)],
+            weight_dates, [80.0, 79.0, 78.0], tolerance_days=7
+        )
+        self.assertEqual(joined, [None, 79.0, 79.0, None])
+
+    def test_rolling_correlation_matches_full_recomputation(self):
+        xs = [80.0, 79.5, 79.7, 78.9, 78.2, 78.4, 77.6]
+        ys = [92.0, 91.0, 91.4, 90.1, 89.5, 89.9, 88.7]
+        rolling = rolling_correlation(xs, ys, 4)
+        expected = [rolling_correlation(xs[i:i + 4], ys[i:i + 4], 4)[0] for i in range(len(xs) - 3)]
+        self.assertEqual(rolling, expected)
+        self.assertGreater(rolling[0], 0.9)
+        # Sin variación no hay correlación definida
+        self.assertEqual(rolling_correlation([1.0] * 3, [2.0, 3.0, 4.0], 3), [None])
+
+    def test_constant_window_after_varying_one_has_no_correlation(self):
+        xs = [81.2, 79.4, 83.9, 80.7, 82.1, 78.8, 80.3, 81.5]
+        ys = [1088.3, 1097.9, 1091.7, 1094.4, 1094.7, 1094.7, 1094.7, 1094.7]
+        rolling = rolling_correlation(xs, ys, 4)
+        self.assertIsNotNone(rolling[0])
+        self.assertIsNone(rolling[-1])
+
+    def test_endpoint_aligns_series_and_caches_until_new_data(self):
+        for days_ago, weight, waist, hips in [(30, 84.0, 94.0, 104.0), (20, 83.0, 92.0, 103.0),
+                                              (10, 81.5, 90.0, 102.5), (0, 80.0, 88.0, 102.0)]:
+            day = self.today - timedelta(days=days_ago)
+            WeightRecord.objects.create(user=self.user, date=day - timedelta(days=1), weight=weight)
+            BodyMeasurement.objects.create(user=self.user, date=day, waist=waist, hips=hips)
+        url = reverse('tracking:body_composition_analytics')
+
+        data = self.client.get(url, {'window': 3}).json()
+        self.assertEqual(data['weight'], [84.0, 83.0, 81.5, 80.0])
+        self.assertEqual(len(data['correlations']['waist']['values']), 2)
+        self.assertGreater(data['correlations']['waist']['overall'], 0.9)
+        self.assertEqual(data['correlations']['chest']['values'], [])
+        self.assertEqual(data['waist_to_hip']['latest'], round(88.0 / 102.0, 4))
+        self.assertLess(data['waist_to_hip']['monthly_change'], 0)
+
+        with self.assertNumQueries(3):  # sesión, usuario y resumen
+            self.client.get(url, {'window': 3})
+
+        BodyMeasurement.objects.filter(user=self.user, date=self.today).update(waist=95.0)
+        BodyMeasurement.objects.get(user=self.user, date=self.today).save()
+        data = self.client.get(url, {'window': 3}).json()
+        self.assertEqual(data['waist_to_hip']['latest'], round(95.0 / 102.0, 4))
+
+    def test_invalid_window_is_rejected(self):
+        url = reverse('tracking:body_composition_analytics')
+        for window in ['abc', '2', '100']:
+            self.assertEqual(self.client.get(url, {'window': window}).status_code, 400)
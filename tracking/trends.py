@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from .models import WeightRecord
+
+# Fracción de la distancia al nuevo peso que recorre la tendencia por cada día transcurrido
+TREND_SMOOTHING = 0.1
+# Días de tendencia sobre los que se ajusta la recta de la proyección
+PROJECTION_WINDOW_DAYS = 28
+MIN_PROJECTION_POINTS = 3
+# Más allá de este plazo la meta se considera fuera de alcance con el ritmo actual
+MAX_PROJECTION_DAYS = 5 * 365
+
+
+def smooth(trend, days, weight):
+    """Avanza una media móvil exponencial ``days`` días hacia ``weight``.
+
+    Con registros diarios equivale a ``trend + 0.1 * (weight - trend)``; si hay
+    días sin registro el peso nuevo cuenta como si se hubiera repetido cada día.
+    """
+    factor = 1 - (1 - TREND_SMOOTHING) ** max(days, 1)
+    return trend + factor * (weight - trend)
+
+
+def update_trends(user_id, since=None):
+    """Recalcula la tendencia de los registros desde ``since`` (todos si es ``None``).
+
+    Los registros anteriores no cambian, así que se parte de la tendencia del
+    último de ellos: agregar el peso de hoy lee una fila y escribe otra, y un
+    día cargado con atraso solo recalcula los posteriores.
+    """
+    records = WeightRecord.objects.filter(user_id=user_id)
+    previous = None
+    if since is not None:
+        previous = records.filter(date__lt=since, trend__isnull=False).order_by('-date').values_list(
+            'date', 'trend'
+        ).first()
+        records = records.filter(date__gte=since)
+
+    changed = []
+    for record in records.order_by('date').only('id', 'date', 'weight', 'trend'):
+        if previous is None:
+            trend = record.weight
+        else:
+            trend = smooth(previous[1], (record.date - previous[0]).days, record.weight)
+        if record.trend != trend:
+            record.trend = trend
+            changed.append(record)
+        previous = (record.date, trend)
+
+    WeightRecord.objects.bulk_update(changed, ['trend'], batch_size=500)
+    return len(changed)
+
+
+def fit_line(xs, ys):
+    """Pendiente e intercepto por mínimos cuadrados, en una pasada con sumas acumuladas"""
+    count = len(xs)
+    sum_x = sum(xs)
+    sum_y = sum(ys)
+    sum_xx = sum(x * x for x in xs)
+    sum_xy = sum(x * y for x, y in zip(xs, ys))
+    denominator = count * sum_xx - sum_x * sum_x
+    if count < 2 or denominator == 0:
+        return None
+    slope = (count * sum_xy - sum_x * sum_y) / denominator
+    return slope, (sum_y - slope * sum_x) / count
+
+
+def project_weight(user, goal, window_days=PROJECTION_WINDOW_DAYS):
+    """Ritmo de la tendencia en la ventana reciente y fecha estimada para llegar a ``goal``.
+
+    ``estimated_date`` es ``None`` si no hay datos suficientes, si la tendencia
+    se aleja de la meta o si no la alcanzaría en ``MAX_PROJECTION_DAYS``.
+
+    Solo se leen los registros de la ventana (uno por día como máximo, y la
+    vista limita la ventana a un año), no todo el historial; la recta se ajusta
+    en Python con una pasada sobre esas filas.
+    """
+    latest = WeightRecord.objects.filter(user=user, trend__isnull=False).order_by('-date').values_list(
+        'date', flat=True
+    ).first()
+    result = {
+        'goal': goal,
+        'window_days': window_days,
+        'points': 0,
+        'trend': None,
+        'weekly_change': None,
+        'estimated_date': None,
+        'days_remaining': None,
+    }
+    if latest is None:
+        return result
+
+    rows = WeightRecord.objects.filter(
+        user=user, trend__isnull=False, date__gt=latest - timedelta(days=window_days)
+    ).values_list('date', 'trend')
+    xs = []
+    ys = []
+    for date, trend in rows:
+        xs.append((date - latest).days)
+        ys.append(trend)
+    result['points'] = len(xs)
+    if len(xs) < MIN_PROJECTION_POINTS:
+        return result
+
+    line = fit_line(xs, ys)
+    if line is None:
+        return result
+    slope, intercept = line
+    # En x = 0 la recta da la tendencia ajustada a la fecha del último registro
+    result['trend'] = round(intercept, 2)
+    result['weekly_change'] = round(slope * 7, 2)
+
+    remaining = goal - intercept
+    if remaining == 0:
+        days = 0
+    elif slope == 0 or (remaining > 0) != (slope > 0):
+        return result
+    else:
+        days = round(remaining / slope)
+        if days > MAX_PROJECTION_DAYS:
+            return result
+    result['days_remaining'] = days
+    result['estimated_date'] = latest + timedelta(days=days)
+    return result
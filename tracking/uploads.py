@@ -0,0 +1,196 @@
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import transaction
+from django.db.models import F
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+from .models import PhotoBlob, ProgressPhoto, blob_path
+from .summary import refresh_summary
+
+# Hilos para validar y guardar los archivos de una sesión (trabajo principalmente de E/S)
+UPLOAD_THREADS = 3
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Resultado de guardar un archivo: ``written`` indica si se escribió ahora o ya existía
+StoredFile = namedtuple('StoredFile', 'sha256 name size written')
+
+
+class ContentHashUploadHandler(FileUploadHandler):
+    """Calcula el SHA-256 de cada archivo a medida que llega, sin retenerlo.
+
+    Deja pasar los bloques al siguiente handler (memoria o archivo temporal) y
+    guarda el resultado en ``request.upload_hashes[(campo, nombre)]``.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        request.upload_hashes = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.request.upload_hashes[(self.field_name, self.file_name)] = self.hasher.hexdigest()
+        return None
+
+
+def hash_uploads(view):
+    """Instala ``ContentHashUploadHandler`` antes de leer el cuerpo de la petición.
+
+    Los handlers solo se pueden cambiar antes de que algo lea ``request.POST``;
+    como el middleware CSRF lo hace, la vista queda exenta y el token se
+    verifica después con ``csrf_protect``.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(0, ContentHashUploadHandler(request))
+        return protected(request, *args, **kwargs)
+    return wrapper
+
+
+def attach_content_hashes(request):
+    """Copia a cada archivo subido el hash calculado al recibirlo, como ``content_hash``"""
+    hashes = getattr(request, 'upload_hashes', {})
+    for field_name, uploads in request.FILES.lists():
+        for upload in uploads:
+            upload.content_hash = hashes.get((field_name, upload.name))
+
+
+def hash_file(upload):
+    """SHA-256 leyendo el archivo por bloques, para archivos que no pasaron por el handler"""
+    hasher = hashlib.sha256()
+    for chunk in upload.chunks(HASH_CHUNK_SIZE):
+        hasher.update(chunk)
+    upload.seek(0)
+    return hasher.hexdigest()
+
+
+def verify_image(upload):
+    """Comprueba con Pillow que el archivo sea una imagen completa y lo deja listo para leer"""
+    try:
+        with Image.open(upload) as image:
+            image.verify()
+    except Exception:
+        raise ValidationError('El archivo no es una imagen válida')
+    finally:
+        upload.seek(0)
+
+
+def file_extension(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension.isalnum() and len(extension) <= 5 else 'jpg'
+
+
+def store_upload(upload, storage):
+    """Valida y guarda un archivo en su ruta por contenido, si aún no existe.
+
+    No toca la base de datos, así que puede ejecutarse en un hilo. El storage
+    copia el archivo por bloques (o mueve el temporal cuando Django ya lo
+    escribió a disco por superar ``FILE_UPLOAD_MAX_MEMORY_SIZE``), así que la
+    imagen nunca se carga completa en memoria.
+    """
+    verify_image(upload)
+    sha256 = getattr(upload, 'content_hash', None) or hash_file(upload)
+    name = blob_path(sha256, file_extension(upload.name))
+    if storage.exists(name):
+        return StoredFile(sha256, name, upload.size, False)
+    return StoredFile(sha256, storage.save(name, upload), upload.size, True)
+
+
+def register_blob(stored, storage, upload):
+    """Suma una referencia al archivo, creando su fila si es nuevo.
+
+    Si otro envío guardó el mismo contenido primero, se conserva ese archivo y
+    se descarta la copia que se acaba de escribir. Si la fila es nueva pero el
+    archivo ya existía, es el de una foto borrada con su borrado aún en cola:
+    se vuelve a escribir para que el borrado pendiente lo reconozca como nuevo
+    y no lo elimine.
+    """
+    blob, created = PhotoBlob.objects.get_or_create(
+        sha256=stored.sha256,
+        defaults={'name': stored.name, 'size': stored.size}
+    )
+    if not created and stored.written and stored.name != blob.name:
+        storage.delete(stored.name)
+    if created and not stored.written:
+        upload.seek(0)
+        storage.delete(stored.name)
+        storage.save(stored.name, upload)
+    PhotoBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+    return blob, created
+
+
+def save_photo_session(user, uploads, notes=''):
+    """Guarda varias fotos de una sesión en paralelo y crea sus filas en una sola consulta.
+
+    ``uploads`` es una lista de ``(tipo, archivo)``. Si algún archivo falla se
+    eliminan los que se escribieron y se lanza ``ValidationError`` con los
+    errores por tipo.
+    """
+    storage = ProgressPhoto._meta.get_field('photo').storage
+
+    with ThreadPoolExecutor(max_workers=min(UPLOAD_THREADS, len(uploads)) or 1) as pool:
+        futures = [pool.submit(store_upload, upload, storage) for _, upload in uploads]
+
+    errors = {}
+    stored_files = []
+    for (photo_type, _), future in zip(uploads, futures):
+        error = future.exception()
+        if error is None:
+            stored_files.append(future.result())
+        else:
+            errors[photo_type] = (
+                error.messages if isinstance(error, ValidationError) else ['No se pudo guardar el archivo']
+            )
+
+    written = [stored.name for stored in stored_files if stored.written]
+    if errors:
+        _delete_files(storage, written)
+        raise ValidationError(errors)
+
+    try:
+        with transaction.atomic():
+            photos = []
+            for (photo_type, upload), stored in zip(uploads, stored_files):
+                blob, created = register_blob(stored, storage, upload)
+                photo = ProgressPhoto(user=user, photo_type=photo_type, notes=notes, blob=blob)
+                photo.photo.name = blob.name
+                if not created:
+                    _reuse_renditions(photo)
+                photos.append(photo)
+            photos = ProgressPhoto.objects.bulk_create(photos)
+            # bulk_create no emite señales: el resumen se actualiza una vez por sesión
+            refresh_summary(user.pk, ProgressPhoto)
+            return photos
+    except Exception:
+        _delete_files(storage, written)
+        raise
+
+
+def _reuse_renditions(photo):
+    """Un duplicado toma las versiones ya generadas del mismo archivo y no pasa por la cola"""
+    renditions = ProgressPhoto.objects.filter(
+        blob=photo.blob, status=ProgressPhoto.STATUS_READY
+    ).exclude(renditions={}).values_list('renditions', flat=True).first()
+    if renditions:
+        photo.renditions = renditions
+        photo.status = ProgressPhoto.STATUS_READY
+
+
+def _delete_files(storage, names):
+    for name in names:
+        storage.delete(name)
@@ -0,0 +1,51 @@
+from django.db import transaction
+
+from .models import BodyMeasurement, WeightRecord
+from .rollups import rebuild_weight_rollups
+from .summary import refresh_summary
+from .trends import update_trends
+
+# Campos que se reemplazan al escribir el registro de un día
+DAILY_FIELDS = {
+    WeightRecord: ['weight', 'notes'],
+    BodyMeasurement: ['chest', 'waist', 'hips', 'arms', 'thighs', 'notes'],
+}
+
+
+def upsert_daily(model, user, date, values):
+    """Crea o actualiza el registro del día de un usuario.
+
+    ``update_or_create`` bloquea la fila existente y, si dos envíos compiten por
+    crearla, reintenta la lectura en lugar de fallar por ``unique_together``.
+    Pasa por ``save()``, así que las señales mantienen los acumulados.
+    """
+    return model.objects.update_or_create(user=user, date=date, defaults=values)
+
+
+def bulk_upsert_daily(model, user, entries, batch_size=500):
+    """Escribe muchos días de un usuario con ``INSERT ... ON CONFLICT (user, date) DO UPDATE``.
+
+    ``entries`` es un dict ``{fecha: valores}``; cada día reemplaza todos los
+    campos de ``DAILY_FIELDS``. ``bulk_create`` no emite señales, así que los
+    acumulados de peso y el resumen se reconstruyen una sola vez al terminar y
+    la tendencia se recalcula desde el día más antiguo recibido.
+    """
+    fields = DAILY_FIELDS[model]
+    records = [
+        model(user=user, date=date, **{field: values.get(field) for field in fields})
+        for date, values in sorted(entries.items())
+    ]
+    with transaction.atomic():
+        model.objects.bulk_create(
+            records,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=fields
+        )
+        if model is WeightRecord:
+            rebuild_weight_rollups(user.id)
+            if records:
+                update_trends(user.id, records[0].date)
+        refresh_summary(user.id, model)
+    return len(records)
@@ -7,14 +7,34 @@ urlpatterns = [
     # Weight tracking
     path('weight/', views.weight_tracker, name='weight_tracker'),
     path('weight/delete/<int:pk>/', views.weight_delete, name='weight_delete'),
+    path('weight/projection/', views.weight_projection, name='weight_projection'),
     
     # Body measurements
     path('measurements/', views.measurements, name='measurements'),
     path('measurements/delete/<int:pk>/', views.measurement_delete, name='measurement_delete'),
     
+    # Chart data
+    path('chart-series/', views.chart_series, name='chart_series'),
+    
+    # Analytics
+    path('analytics/body-composition/', views.body_composition_analytics, name='body_composition_analytics'),
+    
+    # Sync API
+    path('api/weight/sync/', views.weight_sync, name='weight_sync'),
+    path('api/measurements/sync/', views.measurements_sync, name='measurements_sync'),
+    
+    # Import
+    path('import/', views.tracking_import, name='import'),
+    
     # Progress photos
     path('photos/', views.photos, name='photos'),
     path('photos/delete/<int:pk>/', views.photo_delete, name='photo_delete'),
+    path('photos/upload-session/', views.photo_upload_session, name='photo_upload_session'),
     path('photos/compare/', views.photo_compare, name='photo_compare'),
+    path('photos/compare/image/', views.photo_compare_image, name='photo_compare_image'),
     path('photos/date/', views.get_photos_for_date, name='get_photos_for_date'),
+    path('photos/range/', views.photos_range, name='photos_range'),
+    path('photos/year/', views.photos_year, name='photos_year'),
+    path('photos/counts/', views.photos_counts, name='photos_counts'),
+    path('media/<path:name>', views.photo_media, name='photo_media'),
 ]
\ No newline at end of file
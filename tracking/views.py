@@ -1,15 +1,54 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Avg, Max, Min, Count
-from django.db.models.functions import ExtractWeek, ExtractMonth
-from django.http import JsonResponse
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_POST, require_safe
 from datetime import datetime, timedelta
-from calendar import monthrange
+import hashlib
 import json
 
 from .models import WeightRecord, BodyMeasurement, ProgressPhoto
-from .forms import WeightRecordForm, BodyMeasurementForm, ProgressPhotoForm
+from .forms import (
+    WeightRecordForm, BodyMeasurementForm, ProgressPhotoForm,
+    WeightSyncForm, BodyMeasurementSyncForm, TrackingImportForm, ProgressPhotoSessionForm
+)
+from .analytics import (
+    CORRELATION_WINDOW, MAX_CORRELATION_WINDOW, MIN_CORRELATION_WINDOW, body_composition
+)
+from .calendars import (
+    month_bounds, month_calendar, photo_counts, photo_months, year_bounds, year_calendar
+)
+from .columns import MeasurementColumns
+from .comparisons import (
+    COMPARE_HEIGHT, COMPARE_MODES, MAX_COMPARE_HEIGHT, MIN_COMPARE_HEIGHT, render_comparison
+)
+from .history import measurement_history_page, photo_gallery_page, weight_history_page
+from .media import serve_file
+from .renditions import RENDITION_SIZES
+from .importers import IMPORT_KINDS, ImportFormatError, detect_format, read_records, validate_records
+from .rollups import weight_rollup_series
+from .series import RESOLUTIONS, SERIES_FIELDS, load_series, load_series_group, series_payload
+from .summary import cached_analytics, get_summary
+from .trends import PROJECTION_WINDOW_DAYS, project_weight
+from .uploads import attach_content_hashes, hash_uploads, save_photo_session
+from .upserts import bulk_upsert_daily, upsert_daily
+
+# Puntos que se incrustan en la página; el resto se pide a chart_series al cambiar el rango
+INITIAL_CHART_POINTS = 365
+MAX_CHART_POINTS = 5000
+# Días que acepta una sola llamada a las APIs de sincronización
+MAX_SYNC_RECORDS = 1000
+# Errores de validación que se muestran al importar un archivo
+MAX_IMPORT_ERRORS = 10
+# Días que abarca como máximo una consulta de fotos por rango
+MAX_PHOTO_RANGE_DAYS = 366
+# Los conteos por día son livianos: se aceptan hasta diez años
+MAX_PHOTO_COUNT_DAYS = 3660
 
 # ==================== WEIGHT TRACKING ====================
 
@@ -18,125 +57,56 @@ def weight_tracker(request):
     if request.method == 'POST':
         form = WeightRecordForm(request.POST)
         if form.is_valid():
-            # Verificar si ya existe un registro para hoy
-            today = datetime.now().date()
-            existing = WeightRecord.objects.filter(user=request.user, date=today).first()
-            
-            if existing:
-                # Actualizar el registro existente
-                existing.weight = form.cleaned_data['weight']
-                existing.notes = form.cleaned_data['notes']
-                existing.save()
-                messages.success(request, '¡Peso actualizado exitosamente!')
-            else:
-                # Crear nuevo registro
-                weight_record = form.save(commit=False)
-                weight_record.user = request.user
-                weight_record.save()
+            # Un solo registro por día: se crea o se actualiza el de hoy
+            _, created = upsert_daily(
+                WeightRecord, request.user, timezone.localdate(), form.cleaned_data
+            )
+            if created:
                 messages.success(request, '¡Peso registrado exitosamente!')
+            else:
+                messages.success(request, '¡Peso actualizado exitosamente!')
             
             return redirect('tracking:weight_tracker')
     else:
         form = WeightRecordForm()
 
-    # Obtener todos los registros
-    all_records = WeightRecord.objects.filter(user=request.user).order_by('-date', '-id')
-    records_list = list(all_records)
-    
-    # Calcular estadísticas
-    stats = {}
-    if records_list:
-        first_record = records_list[-1]  # El más antiguo
-        last_record = records_list[0]    # El más reciente
-        
-        stats['inicio'] = {
-            'peso': first_record.weight,
-            'fecha': first_record.date
-        }
-        stats['actual'] = {
-            'peso': last_record.weight,
-            'fecha': last_record.date
-        }
-        stats['cambio_total'] = last_record.weight - first_record.weight
-        stats['max'] = all_records.aggregate(Max('weight'))['weight__max']
-        stats['min'] = all_records.aggregate(Min('weight'))['weight__min']
-        
-        # Estadísticas del último mes
-        un_mes_atras = datetime.now().date() - timedelta(days=30)
-        registros_mes = all_records.filter(date__gte=un_mes_atras)
-        if registros_mes.exists():
-            primer_registro_mes = registros_mes.last()
-            stats['cambio_mes'] = last_record.weight - primer_registro_mes.weight
-            stats['promedio_mes'] = registros_mes.aggregate(Avg('weight'))['weight__avg']
-        else:
-            stats['cambio_mes'] = 0
-            stats['promedio_mes'] = last_record.weight
-
-    # Preparar datos para gráficas
-    chart_data = {
-        'daily': [],
-        'weekly': {},
-        'monthly': {}
-    }
-
-    # Datos diarios
-    for record in reversed(records_list):  # Orden cronológico para la gráfica
-        chart_data['daily'].append({
-            'date': record.date.strftime('%Y-%m-%d'),
-            'weight': float(record.weight)
-        })
+    # Las estadísticas salen del resumen por usuario; la gráfica solo lee fecha y peso
+    summary = get_summary(request.user)
 
-    # Datos semanales
-    weekly_data = all_records.annotate(
-        week=ExtractWeek('date')
-    ).values('week').annotate(
-        avg_weight=Avg('weight')
-    ).order_by('week')
-
-    for entry in weekly_data:
-        chart_data['weekly'][f"Semana {entry['week']}"] = float(entry['avg_weight'])
-
-    # Datos mensuales
-    monthly_data = all_records.annotate(
-        month=ExtractMonth('date')
-    ).values('month').annotate(
-        avg_weight=Avg('weight')
-    ).order_by('month')
-
-    months = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
-    for entry in monthly_data:
-        chart_data['monthly'][months[entry['month']-1]] = float(entry['avg_weight'])
-
-    # Preparar registros con cambios
-    weight_records = []
-    for i, record in enumerate(records_list):
-        entry = {
-            'date': record.date,
-            'weight': record.weight,
-            'notes': record.notes,
-            'id': record.id,
-            'change': None,
-            'change_symbol': None
-        }
-        
-        if i < len(records_list) - 1:
-            previous_weight = records_list[i + 1].weight
-            change = record.weight - previous_weight
-            entry['change'] = abs(change)
-            entry['change_symbol'] = '↑' if change > 0 else '↓' if change < 0 else '='
-        else:
-            entry['change'] = 0
-            
-        weight_records.append(entry)
+    # La tabla se pagina por cursor; los cambios entre registros se calculan en SQL
+    cursor = request.GET.get('cursor')
+    weight_records, next_cursor = weight_history_page(request.user, cursor)
+    # Peso diario y tendencia salen de la misma consulta
+    series = load_series_group(request.user, ['weight', 'trend'])
 
     context = {
         'form': form,
         'weight_records': weight_records,
-        'stats': stats,
-        'chart_data': json.dumps(chart_data)
+        'cursor': cursor,
+        'next_cursor': next_cursor,
+        'stats': summary.weight_stats(timezone.localdate()),
+        'initial_chart_points': INITIAL_CHART_POINTS,
+        'chart_data': json.dumps({
+            'daily': series_payload(*series['weight'], INITIAL_CHART_POINTS),
+            'trend': series_payload(*series['trend'], INITIAL_CHART_POINTS),
+            **weight_rollup_series(request.user)
+        })
     }
     return render(request, 'tracking/weight_tracker.html', context)
 
+@login_required
+def weight_projection(request):
+    """API endpoint con el ritmo de la tendencia y la fecha estimada para una meta de peso"""
+    try:
+        goal = float(request.GET['goal'])
+        window = int(request.GET.get('window', PROJECTION_WINDOW_DAYS))
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+    if not 0 < goal < 1000 or not 7 <= window <= 365:
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+
+    return JsonResponse(project_weight(request.user, goal, window))
+
 @login_required
 def weight_delete(request, pk):
     record = get_object_or_404(WeightRecord, pk=pk, user=request.user)
@@ -152,81 +122,31 @@ def measurements(request):
     if request.method == 'POST':
         form = BodyMeasurementForm(request.POST)
         if form.is_valid():
-            # Verificar si ya existe un registro para hoy
-            today = datetime.now().date()
-            existing = BodyMeasurement.objects.filter(user=request.user, date=today).first()
-            
-            if existing:
-                # Actualizar el registro existente
-                for field in ['chest', 'waist', 'hips', 'arms', 'thighs', 'notes']:
-                    setattr(existing, field, form.cleaned_data[field])
-                existing.save()
-                messages.success(request, '¡Medidas actualizadas exitosamente!')
-            else:
-                # Crear nuevo registro
-                measurement = form.save(commit=False)
-                measurement.user = request.user
-                measurement.save()
+            # Un solo registro por día: se crea o se actualiza el de hoy
+            _, created = upsert_daily(
+                BodyMeasurement, request.user, timezone.localdate(), form.cleaned_data
+            )
+            if created:
                 messages.success(request, '¡Medidas registradas exitosamente!')
+            else:
+                messages.success(request, '¡Medidas actualizadas exitosamente!')
             
             return redirect('tracking:measurements')
     else:
         form = BodyMeasurementForm()
 
-    # Obtener medidas ordenadas
-    all_measurements = BodyMeasurement.objects.filter(user=request.user).order_by('-date', '-id')
-    measurements_list = list(all_measurements)
-    
-    # Preparar datos para gráficas
-    chart_data = {
-        'dates': [],
-        'chest': [],
-        'waist': [],
-        'hips': [],
-        'arms': [],
-        'thighs': []
-    }
+    # La tabla se pagina por cursor con los cambios calculados en SQL
+    cursor = request.GET.get('cursor')
+    measurement_rows, next_cursor = measurement_history_page(request.user, cursor)
 
-    # Datos en orden cronológico para gráficas
-    for record in reversed(measurements_list):
-        chart_data['dates'].append(record.date.strftime('%Y-%m-%d'))
-        chart_data['chest'].append(float(record.chest) if record.chest else None)
-        chart_data['waist'].append(float(record.waist) if record.waist else None)
-        chart_data['hips'].append(float(record.hips) if record.hips else None)
-        chart_data['arms'].append(float(record.arms) if record.arms else None)
-        chart_data['thighs'].append(float(record.thighs) if record.thighs else None)
-    
-    # Preparar datos para tabla con cambios
-    measurements_with_changes = []
-    for i, record in enumerate(measurements_list):
-        entry = {
-            'date': record.date,
-            'chest': {'value': record.chest, 'change': None, 'change_symbol': None},
-            'waist': {'value': record.waist, 'change': None, 'change_symbol': None},
-            'hips': {'value': record.hips, 'change': None, 'change_symbol': None},
-            'arms': {'value': record.arms, 'change': None, 'change_symbol': None},
-            'thighs': {'value': record.thighs, 'change': None, 'change_symbol': None},
-            'notes': record.notes,
-            'id': record.id
-        }
-        
-        # Calcular cambios si hay registro anterior
-        if i < len(measurements_list) - 1:
-            prev_record = measurements_list[i + 1]
-            
-            for field in ['chest', 'waist', 'hips', 'arms', 'thighs']:
-                current_value = getattr(record, field)
-                prev_value = getattr(prev_record, field)
-                if current_value is not None and prev_value is not None:
-                    change = current_value - prev_value
-                    entry[field]['change'] = abs(change)
-                    entry[field]['change_symbol'] = '↑' if change > 0 else '↓' if change < 0 else '='
-        
-        measurements_with_changes.append(entry)
+    # La gráfica lee todas las medidas en una consulta transpuesta a columnas
+    chart_data = MeasurementColumns.for_user(request.user).chart_data(INITIAL_CHART_POINTS)
 
     context = {
         'form': form,
-        'measurements': measurements_with_changes,
+        'measurements': measurement_rows,
+        'cursor': cursor,
+        'next_cursor': next_cursor,
         'chart_data': json.dumps(chart_data)
     }
     return render(request, 'tracking/measurements.html', context)
@@ -239,74 +159,180 @@ def measurement_delete(request, pk):
         messages.success(request, '¡Registro eliminado exitosamente!')
     return redirect('tracking:measurements')
 
+@login_required
+def chart_series(request):
+    """API endpoint con la serie de una métrica, reducida en el servidor para las gráficas"""
+    metric = request.GET.get('metric', 'weight')
+    resolution = request.GET.get('resolution', 'day')
+    if metric not in SERIES_FIELDS:
+        return JsonResponse({'error': 'Invalid metric'}, status=400)
+    if resolution not in RESOLUTIONS:
+        return JsonResponse({'error': 'Invalid resolution'}, status=400)
+
+    try:
+        start = request.GET.get('start')
+        end = request.GET.get('end')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        points = int(request.GET.get('points', INITIAL_CHART_POINTS))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid date format'}, status=400)
+    points = min(max(points, 3), MAX_CHART_POINTS)
+
+    dates, values = load_series(request.user, metric, start, end)
+    response = JsonResponse({
+        'metric': metric,
+        'start': start,
+        'end': end,
+        **series_payload(dates, values, points, resolution)
+    })
+
+    etag = quote_etag(hashlib.md5(response.content).hexdigest())
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=60)
+    return get_conditional_response(request, etag=etag, response=response)
+
+# ==================== ANALYTICS ====================
+
+@login_required
+def body_composition_analytics(request):
+    """API endpoint con la correlación entre peso y medidas y el índice cintura/cadera"""
+    try:
+        window = int(request.GET.get('window', CORRELATION_WINDOW))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid window'}, status=400)
+    if not MIN_CORRELATION_WINDOW <= window <= MAX_CORRELATION_WINDOW:
+        return JsonResponse({'error': 'Invalid window'}, status=400)
+
+    payload = cached_analytics(
+        request.user, f'body_composition:{window}', lambda: body_composition(request.user, window)
+    )
+    return _revalidated(request, JsonResponse(payload))
+
+# ==================== SYNC API ====================
+
+def _bulk_sync(request, model, form_class):
+    """Valida un JSON ``{"records": [...]}`` con un día por elemento y lo escribe de una vez.
+
+    Si algún día es inválido no se escribe nada; si una fecha se repite, gana
+    el último elemento.
+    """
+    try:
+        records = json.loads(request.body)['records']
+        if not isinstance(records, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Invalid JSON payload'}, status=400)
+
+    if len(records) > MAX_SYNC_RECORDS:
+        return JsonResponse({'error': f'Too many records (max {MAX_SYNC_RECORDS})'}, status=400)
+
+    entries, errors = validate_records(records, form_class)
+    if errors:
+        return JsonResponse({'error': 'Invalid records', 'records': errors}, status=400)
+
+    count = bulk_upsert_daily(model, request.user, entries)
+    return JsonResponse({'status': 'success', 'count': count})
+
+@login_required
+@require_POST
+def weight_sync(request):
+    """API endpoint para que una báscula envíe varios días de peso"""
+    return _bulk_sync(request, WeightRecord, WeightSyncForm)
+
+@login_required
+@require_POST
+def measurements_sync(request):
+    """API endpoint para enviar varios días de medidas"""
+    return _bulk_sync(request, BodyMeasurement, BodyMeasurementSyncForm)
+
+# ==================== IMPORT ====================
+
+@login_required
+def tracking_import(request):
+    """Importa un historial de peso o medidas desde un archivo CSV o JSON"""
+    if request.method == 'POST':
+        form = TrackingImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            model, record_form = IMPORT_KINDS[form.cleaned_data['kind']]
+            try:
+                records = read_records(upload.read(), detect_format(upload.name))
+            except ImportFormatError as error:
+                form.add_error('file', str(error))
+            else:
+                entries, errors = validate_records(records, record_form)
+                if errors:
+                    for error in errors[:MAX_IMPORT_ERRORS]:
+                        fields = '; '.join(
+                            f"{field}: {' '.join(messages_list)}"
+                            for field, messages_list in error['errors'].items()
+                        )
+                        form.add_error(None, f"Registro {error['index'] + 1}: {fields}")
+                    if len(errors) > MAX_IMPORT_ERRORS:
+                        form.add_error(None, f'... y {len(errors) - MAX_IMPORT_ERRORS} registros más con errores')
+                else:
+                    count = bulk_upsert_daily(model, request.user, entries)
+                    messages.success(request, f'¡{count} días importados exitosamente!')
+                    if model is WeightRecord:
+                        return redirect('tracking:weight_tracker')
+                    return redirect('tracking:measurements')
+    else:
+        form = TrackingImportForm(initial={'kind': request.GET.get('kind', 'weight')})
+
+    return render(request, 'tracking/import.html', {'form': form})
+
 # ==================== PROGRESS PHOTOS ====================
 
+def _serialize_photo(photo):
+    return {
+        'id': photo.id,
+        'url': photo.url,
+        'thumb_url': photo.thumb_url,
+        'medium_url': photo.medium_url,
+        'srcset': photo.srcset,
+        'status': photo.status,
+        'type': photo.get_photo_type_display(),
+        'notes': photo.notes,
+        'date': photo.date.strftime('%Y-%m-%d')
+    }
+
 @login_required
+@hash_uploads
 def photos(request):
     if request.method == 'POST':
+        attach_content_hashes(request)
         form = ProgressPhotoForm(request.POST, request.FILES)
         if form.is_valid():
-            photo = form.save(commit=False)
-            photo.user = request.user
-            photo.save()
-            messages.success(request, '¡Foto guardada exitosamente!')
-            return redirect('tracking:photos')
+            # Se guarda por contenido; run_photo_worker genera las versiones fuera de la petición
+            try:
+                save_photo_session(
+                    request.user,
+                    [(form.cleaned_data['photo_type'], form.cleaned_data['photo'])],
+                    form.cleaned_data['notes'] or ''
+                )
+            except ValidationError as error:
+                form.add_error('photo', error.message_dict[form.cleaned_data['photo_type']])
+            else:
+                messages.success(request, '¡Foto guardada exitosamente!')
+                return redirect('tracking:photos')
     else:
         form = ProgressPhotoForm()
+    session_form = ProgressPhotoSessionForm()
 
     # Obtener mes y año de la URL o usar actual
     year = int(request.GET.get('year', datetime.now().year))
     month = int(request.GET.get('month', datetime.now().month))
-
-    # Obtener fechas con fotos para el mes
-    photo_dates = ProgressPhoto.objects.filter(
-        user=request.user,
-        date__year=year,
-        date__month=month
-    ).values('date').annotate(count=Count('id')).order_by('date')
-
-    # Crear calendario
-    cal_data = []
-    _, num_days = monthrange(year, month)
-    first_day = datetime(year, month, 1)
-    start_weekday = first_day.weekday()
-
-    # Crear semanas
-    current_week = []
-    
-    # Días vacíos al inicio
-    for i in range(start_weekday):
-        current_week.append({'day': '', 'has_photos': False})
-
-    # Días del mes
-    photo_dates_dict = {d['date']: d['count'] for d in photo_dates}
-    
-    for day in range(1, num_days + 1):
-        current_date = datetime(year, month, day).date()
-        current_week.append({
-            'day': day,
-            'date': current_date,
-            'has_photos': current_date in photo_dates_dict,
-            'photo_count': photo_dates_dict.get(current_date, 0)
-        })
-        
-        if len(current_week) == 7:
-            cal_data.append(current_week)
-            current_week = []
-
-    # Última semana
-    if current_week:
-        while len(current_week) < 7:
-            current_week.append({'day': '', 'has_photos': False})
-        cal_data.append(current_week)
+    first_day, last_day = month_bounds(year, month)
 
     # Navegación
-    prev_month = datetime(year, month, 1) - timedelta(days=1)
-    next_month = (datetime(year, month, 1) + timedelta(days=32)).replace(day=1)
+    prev_month = first_day - timedelta(days=1)
+    next_month = last_day + timedelta(days=1)
 
     context = {
         'form': form,
-        'calendar': cal_data,
+        'session_form': session_form,
+        'calendar': month_calendar(year, month, photo_counts(request.user, first_day, last_day)),
         'current_month': first_day,
         'prev_month': prev_month,
         'next_month': next_month
@@ -318,11 +344,34 @@ def photos(request):
 def photo_delete(request, pk):
     photo = get_object_or_404(ProgressPhoto, pk=pk, user=request.user)
     if request.method == 'POST':
-        photo.delete()  # El método delete del modelo se encarga de eliminar el archivo
+        photo.delete()  # La señal post_delete libera el archivo y sus versiones
         messages.success(request, '¡Foto eliminada exitosamente!')
         return JsonResponse({'status': 'success'})
     return redirect('tracking:photos')
 
+def _requested_range(request, max_days):
+    """Rango pedido como ``start``/``end``, ``year``/``month`` o solo ``year``; ``None`` si no es válido"""
+    try:
+        if request.GET.get('start') or request.GET.get('end'):
+            start = datetime.strptime(request.GET['start'], '%Y-%m-%d').date()
+            end = datetime.strptime(request.GET['end'], '%Y-%m-%d').date()
+        elif request.GET.get('month'):
+            start, end = month_bounds(int(request.GET['year']), int(request.GET['month']))
+        else:
+            start, end = year_bounds(int(request.GET['year']))
+    except (KeyError, ValueError, OverflowError):
+        return None
+    if end < start or (end - start).days > max_days:
+        return None
+    return start, end
+
+def _revalidated(request, response):
+    """ETag por contenido; se revalida siempre porque una foto nueva o recién procesada lo cambia"""
+    etag = quote_etag(hashlib.md5(response.content).hexdigest())
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(request, etag=etag, response=response)
+
 @login_required
 def get_photos_for_date(request):
     """API endpoint para obtener fotos de una fecha específica"""
@@ -340,16 +389,106 @@ def get_photos_for_date(request):
         date=date_obj
     ).order_by('photo_type')
     
-    photos_data = [{
-        'id': photo.id,
-        'url': photo.photo.url,
-        'type': photo.get_photo_type_display(),
-        'notes': photo.notes,
-        'date': photo.date.strftime('%Y-%m-%d')
-    } for photo in photos]
+    photos_data = [_serialize_photo(photo) for photo in photos]
     
     return JsonResponse({'photos': photos_data})
 
+@login_required
+def photos_range(request):
+    """API endpoint con las fotos de un mes (``year``/``month``) o rango (``start``/``end``) agrupadas por fecha"""
+    date_range = _requested_range(request, MAX_PHOTO_RANGE_DAYS)
+    if date_range is None:
+        return JsonResponse({'error': 'Invalid date range'}, status=400)
+    start, end = date_range
+
+    # Una sola consulta para todo el rango; el calendario la reutiliza al elegir cada día
+    dates = {}
+    for photo in ProgressPhoto.objects.filter(
+        user=request.user, date__range=(start, end)
+    ).order_by('date', 'photo_type', 'id'):
+        dates.setdefault(photo.date.strftime('%Y-%m-%d'), []).append(_serialize_photo(photo))
+
+    response = JsonResponse({
+        'start': start,
+        'end': end,
+        'dates': dates
+    })
+
+    return _revalidated(request, response)
+
+@login_required
+def photos_year(request):
+    """Mapa de calor del año con la cantidad de fotos de cada día"""
+    try:
+        year = int(request.GET.get('year', datetime.now().year))
+    except ValueError:
+        return HttpResponseBadRequest('Año inválido')
+    if not datetime.min.year <= year <= datetime.max.year:
+        return HttpResponseBadRequest('Año inválido')
+    counts = photo_counts(request.user, *year_bounds(year))
+
+    context = {
+        'year': year,
+        'months': year_calendar(year, counts),
+        'total': sum(counts.values()),
+        'days_with_photos': len(counts),
+        'prev_year': year - 1,
+        'next_year': year + 1
+    }
+    return render(request, 'tracking/photos_year.html', context)
+
+@login_required
+def photos_counts(request):
+    """API endpoint con la cantidad de fotos por día de un año (``year``) o rango (``start``/``end``), opcionalmente de un ``type``"""
+    date_range = _requested_range(request, MAX_PHOTO_COUNT_DAYS)
+    if date_range is None:
+        return JsonResponse({'error': 'Invalid date range'}, status=400)
+    start, end = date_range
+    photo_type = request.GET.get('type')
+    if photo_type and photo_type not in dict(ProgressPhoto.PHOTO_TYPE_CHOICES):
+        return JsonResponse({'error': 'Invalid photo type'}, status=400)
+
+    counts = photo_counts(request.user, start, end, photo_type)
+    response = JsonResponse({
+        'start': start,
+        'end': end,
+        'total': sum(counts.values()),
+        'counts': {day.strftime('%Y-%m-%d'): count for day, count in sorted(counts.items())}
+    })
+    return _revalidated(request, response)
+
+@login_required
+@require_POST
+@hash_uploads
+def photo_upload_session(request):
+    """API endpoint para subir en una sola petición las fotos de varios ángulos"""
+    attach_content_hashes(request)
+    form = ProgressPhotoSessionForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'error': 'Invalid upload', 'errors': form.errors}, status=400)
+
+    try:
+        photos = save_photo_session(request.user, form.get_uploads(), form.cleaned_data['notes'])
+    except ValidationError as error:
+        return JsonResponse({'error': 'Invalid upload', 'errors': error.message_dict}, status=400)
+
+    return JsonResponse({'status': 'success', 'photos': [_serialize_photo(photo) for photo in photos]})
+
+@login_required
+@require_safe
+def photo_media(request, name):
+    """Entrega un archivo de foto o de sus versiones si pertenece a una foto del usuario"""
+    lookup = Q(photo=name)
+    for label in RENDITION_SIZES:
+        lookup |= Q(**{f'renditions__{label}__name': name})
+    if not ProgressPhoto.objects.filter(lookup, user=request.user).exists():
+        raise Http404('Archivo no encontrado')
+
+    storage = ProgressPhoto._meta.get_field('photo').storage
+    if not storage.exists(name):
+        raise Http404('Archivo no encontrado')
+    return serve_file(request, storage, name)
+
 @login_required
 def photo_compare(request):
     """Vista para comparar fotos de diferentes fechas"""
@@ -357,34 +496,68 @@ def photo_compare(request):
     date1 = request.GET.get('date1')
     date2 = request.GET.get('date2')
 
-    # Obtener todas las fotos del tipo seleccionado
-    photos = ProgressPhoto.objects.filter(
-        user=request.user,
-        photo_type=photo_type
-    ).order_by('-date')
+    # Galería paginada por cursor; las miniaturas se cargan de forma diferida
+    cursor = request.GET.get('cursor')
+    photos, next_cursor = photo_gallery_page(request.user, photo_type, cursor)
 
-    # Si se seleccionaron fechas específicas
-    photo1 = None
-    photo2 = None
-    if date1:
-        try:
-            date1_obj = datetime.strptime(date1, '%Y-%m-%d').date()
-            photo1 = photos.filter(date=date1_obj).first()
-        except ValueError:
-            pass
-            
-    if date2:
+    # Las dos fotos comparadas salen de una sola consulta; gana la más reciente de cada día
+    selected = {}
+    for value in (date1, date2):
         try:
-            date2_obj = datetime.strptime(date2, '%Y-%m-%d').date()
-            photo2 = photos.filter(date=date2_obj).first()
-        except ValueError:
+            selected[value] = datetime.strptime(value, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
             pass
+    by_date = {}
+    if selected:
+        for photo in ProgressPhoto.objects.filter(
+            user=request.user,
+            photo_type=photo_type,
+            date__in=selected.values()
+        ).order_by('-id'):
+            by_date.setdefault(photo.date, photo)
+    photo1 = by_date.get(selected.get(date1))
+    photo2 = by_date.get(selected.get(date2))
+
+    # Los selectores de fecha parten del índice por mes; los días se piden a photos_counts
+    query = request.GET.copy()
+    query.pop('cursor', None)
 
     context = {
         'photo_type': photo_type,
+        'photo_types': ProgressPhoto.PHOTO_TYPE_CHOICES,
         'photos': photos,
+        'cursor': cursor,
+        'next_cursor': next_cursor,
+        'query': query.urlencode(),
         'photo1': photo1,
         'photo2': photo2,
-        'available_dates': list(photos.values_list('date', flat=True).distinct())
+        'date1': date1,
+        'date2': date2,
+        'photo_months': photo_months(request.user, photo_type),
+        'compare_modes': COMPARE_MODES,
+        'compare_mode': request.GET.get('mode', 'side')
     }
-    return render(request, 'tracking/photo_compare.html', context)
\ No newline at end of file
+    return render(request, 'tracking/photo_compare.html', context)
+
+@login_required
+@require_safe
+def photo_compare_image(request):
+    """Imagen con dos fotos del usuario compuestas en el servidor y guardada en caché"""
+    mode = request.GET.get('mode', 'side')
+    try:
+        first_id = int(request.GET['photo1'])
+        second_id = int(request.GET['photo2'])
+        height = int(request.GET.get('height', COMPARE_HEIGHT))
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+    if mode not in dict(COMPARE_MODES) or not MIN_COMPARE_HEIGHT <= height <= MAX_COMPARE_HEIGHT:
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+
+    photos = ProgressPhoto.objects.select_related('blob').filter(user=request.user).in_bulk([first_id, second_id])
+    if first_id not in photos or second_id not in photos:
+        raise Http404('Foto no encontrada')
+
+    # El nombre depende del contenido de ambas fotos, así que la respuesta es inmutable
+    name = render_comparison(photos[first_id], photos[second_id], mode, height)
+    storage = ProgressPhoto._meta.get_field('photo').storage
+    return serve_file(request, storage, name)
\ No newline at end of file